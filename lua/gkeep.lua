@@ -4,6 +4,106 @@ M.dispatch = function(...)
   vim.schedule_wrap(vim.fn._gkeep_dispatch)(...)
 end
 
+local sync_timer
+M.start_sync_timer = function(interval)
+  if sync_timer then
+    sync_timer:stop()
+  else
+    sync_timer = vim.loop.new_timer()
+  end
+  sync_timer:start(interval, interval, function()
+    M.dispatch("sync")
+  end)
+end
+
+local debounce_timers = {}
+-- Call the function after delay ms, restarting the wait if this is called again
+-- with the same key before then
+local function debounce(key, delay, callback)
+  local timer = debounce_timers[key]
+  if timer then
+    timer:stop()
+  else
+    timer = vim.loop.new_timer()
+    debounce_timers[key] = timer
+  end
+  timer:start(delay, 0, callback)
+end
+
+M.schedule_sync = function(delay)
+  debounce("sync", delay, function()
+    M.dispatch("sync")
+  end)
+end
+
+M.schedule_menu_select = function(delay)
+  debounce(
+    "menu_select",
+    delay,
+    vim.schedule_wrap(function()
+      vim.fn._gkeep_menu_action("select")
+    end)
+  )
+end
+
+M.schedule_list_preview = function(delay)
+  debounce(
+    "list_preview",
+    delay,
+    vim.schedule_wrap(function()
+      vim.fn._gkeep_list_action("update_preview")
+    end)
+  )
+end
+
+M.get_buffer_names = function()
+  local ret = {}
+  for _, bufnr in ipairs(vim.api.nvim_list_bufs()) do
+    if vim.api.nvim_buf_is_valid(bufnr) then
+      table.insert(ret, { bufnr, vim.api.nvim_buf_get_name(bufnr) })
+    end
+  end
+  return ret
+end
+
+-- Returns { bufnr, bufname, changedtick, is_preview, is_normal } for each window
+-- in the current tabpage, in the same order as nvim_tabpage_list_wins
+M.get_tabpage_win_info = function()
+  local ret = {}
+  for _, winid in ipairs(vim.api.nvim_tabpage_list_wins(0)) do
+    local bufnr = vim.api.nvim_win_get_buf(winid)
+    local is_preview = vim.wo[winid].previewwindow
+    local is_normal = not is_preview
+      and vim.api.nvim_win_get_config(winid).relative == ""
+      and vim.fn.win_gettype(winid) == ""
+      and vim.bo[bufnr].buftype == ""
+    table.insert(ret, {
+      bufnr,
+      vim.api.nvim_buf_get_name(bufnr),
+      vim.api.nvim_buf_get_changedtick(bufnr),
+      is_preview,
+      is_normal,
+    })
+  end
+  return ret
+end
+
+M.update_preview_bufhidden = function(bufnr)
+  if vim.wo.previewwindow then
+    -- If this buffer is *only* open in the preview window, set bufhidden=wipe
+    if #vim.fn.win_findbuf(bufnr) == 1 then
+      vim.b[bufnr].prev_hidden = vim.bo[bufnr].bufhidden
+      vim.bo[bufnr].bufhidden = "wipe"
+    end
+  else
+    local prev_hidden = vim.b[bufnr].prev_hidden
+    if prev_hidden ~= nil then
+      vim.bo[bufnr].bufhidden = prev_hidden
+      vim.b[bufnr].prev_hidden = nil
+    end
+  end
+end
+
 M.rename_buffers = function(renames)
   for _, tuple in ipairs(renames) do
     local bufnr, old_name, new_name = unpack(tuple)
@@ -22,6 +122,17 @@ M.rename_buffers = function(renames)
   end
 end
 
+M.yank = function(text)
+  vim.fn.setreg("x", text)
+  vim.fn.setreg("", text)
+  local clipboard = vim.o.clipboard
+  if clipboard:find("unnamedplus", 1, true) then
+    vim.fn.setreg("+", text)
+  elseif clipboard:find("unnamed", 1, true) then
+    vim.fn.setreg("*", text)
+  end
+end
+
 M.on_ephemeral_buf_read = function(ft)
   if ft == "norg" then
     -- neorg was inserting a duplicate @document.meta at the top of the buffer
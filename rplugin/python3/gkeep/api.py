@@ -35,6 +35,8 @@ def cmp(a: NoteType, b: NoteType) -> int:
 class KeepApi(Keep):
     _search_query: t.Optional[Query] = None
     _search_results: t.Optional[t.List[NoteType]] = None
+    # The results list that the index was built from, and the id -> row index
+    _search_index: t.Optional[t.Tuple[t.List[NoteType], t.Dict[str, int]]] = None
     _title_count: t.Counter[str] = Counter()
     _archived_title_count: t.Counter[str] = Counter()
 
@@ -201,10 +203,11 @@ class KeepApi(Keep):
         self._search_query = query
         self._search_results = None
         results = []
+        match = query.matcher(self)
         for n in self.all():
             if query != self._search_query:
                 return
-            if query.match(self, n):
+            if match(n):
                 results.append(n)
         results.sort(key=cmp_to_key(cmp))
         self._search_results = results
@@ -217,6 +220,7 @@ class KeepApi(Keep):
     def resort(self, query: Query) -> None:
         if self._search_query == query and self._search_results:
             self._search_results.sort(key=cmp_to_key(cmp))
+            self.clear_search_index()
 
     def get_search(self, query: Query) -> t.List[NoteType]:
         if self._search_query == query:
@@ -224,9 +228,25 @@ class KeepApi(Keep):
         else:
             return []
 
+    def get_search_index(self, query: Query) -> t.Dict[str, int]:
+        """Get a mapping of note id to row in the search results"""
+        results = self.get_search(query)
+        cached = self._search_index
+        # A new search replaces the results list, so check that it's the same one
+        if cached is not None and cached[0] is results:
+            return cached[1]
+        index = {note.id: i for i, note in enumerate(results)}
+        self._search_index = (results, index)
+        return index
+
+    def clear_search_index(self) -> None:
+        """Must be called after modifying the search results in place"""
+        self._search_index = None
+
     def add_search_result(self, query: Query, note: NoteType) -> bool:
         if self._search_query == query and self._search_results:
             self._search_results.append(note)
+            self.clear_search_index()
             return True
         return False
 
@@ -239,4 +259,5 @@ class KeepApi(Keep):
             auth.logout()
         self._search_query = None
         self._search_results = None
+        self._search_index = None
         self._clear()
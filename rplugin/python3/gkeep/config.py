@@ -209,8 +209,15 @@ class Config:
 
     @background
     def save_state(self, state: t.Any) -> None:
-        with open(self._state_file, "w") as ofile:
+        # Don't recreate the state file if we logged out while this was queued
+        if self.state == State.Uninitialized:
+            return
+        # Write to a temp file and swap it in, so that a crash or shutdown in the
+        # middle of a write can't leave behind a truncated state file
+        tmpfile = self._state_file + ".tmp"
+        with open(tmpfile, "w") as ofile:
             json.dump(state, ofile)
+        os.replace(tmpfile, self._state_file)
 
     def load_state(self) -> t.Union[t.Any, None]:
         if not os.path.isfile(self._state_file):
@@ -1,9 +1,11 @@
 import hashlib
 import logging
 import os
+import time
 import typing as t
 from abc import ABC, abstractmethod
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 
 import gkeep.parser as parser
 from gkeep.api import KeepApi
@@ -16,6 +18,11 @@ from pynvim.api import Buffer
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on threads used for bulk file operations
+MAX_IO_WORKERS = 8
+# Coarsest mtime resolution we expect to see (FAT has 2 second timestamps)
+MTIME_RESOLUTION_NS = 2_000_000_000
+
 
 class NoteFile(t.NamedTuple):
     url: NoteUrl
@@ -29,10 +36,43 @@ class NoteFile(t.NamedTuple):
         if NoteUrl.is_ephemeral(bufname):
             lines = None
         else:
-            lines = list(parser.serialize(config, note))
+            lines = parser.serialize(config, note)
         return cls(url, bufname, lines)
 
 
+class FileDigest(t.NamedTuple):
+    """Hash of a note file's content, valid while its mtime and size are unchanged
+
+    Like the git index, a digest recorded within the mtime resolution of the last
+    modification is not trusted, since an edit in the same tick wouldn't change the
+    mtime.
+    """
+
+    digest: str
+    mtime_ns: int
+    size: int
+    recorded_ns: int
+
+    @classmethod
+    def from_stat(cls, digest: str, stat: os.stat_result) -> "FileDigest":
+        return cls(digest, stat.st_mtime_ns, stat.st_size, time.time_ns())
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (
+            self.mtime_ns == stat.st_mtime_ns
+            and self.size == stat.st_size
+            and self.mtime_ns + MTIME_RESOLUTION_NS < self.recorded_ns
+        )
+
+
+class CachedUrl(t.NamedTuple):
+    """The url parsed from a note file, valid while its mtime and size are unchanged"""
+
+    url: NoteUrl
+    mtime_ns: int
+    size: int
+
+
 class ISync(ABC):
     @abstractmethod
     def start(self, state: t.Any) -> None:
@@ -83,13 +123,16 @@ class FileSync(ISync):
         self._api = api
         self._config = config
         self._protected_files: t.Set[str] = set()
+        self._digests: t.Dict[str, FileDigest] = {}
+        self._urls: t.Dict[str, CachedUrl] = {}
 
     def start(self, state: t.Any) -> None:
         assert self._config.state == State.Uninitialized
         restore_state(self._api, state)
         if state is None:
-            for filename, _ in _find_files(self._config):
-                self._protected_files.add(filename)
+            self._protected_files.update(
+                filename for filename, _ in _find_files(self._config, self._urls)
+            )
         else:
             with status("Reading note files"):
                 self._protected_files.update(self._find_files_with_changes())
@@ -106,8 +149,11 @@ class FileSync(ISync):
                 ],
                 updated_notes,
                 True,
+                self._digests,
+                self._urls,
             )
         with status("Loading changed files"):
+            today = datetime.now().date()
             for filename in need_load:
                 logger.warning(
                     "Changes detected in %s. Backing up Google Keep note",
@@ -117,7 +163,7 @@ class FileSync(ISync):
                 assert url is not None
                 note = self._api.get(url.id)
                 assert note is not None
-                backup = _make_backup(note)
+                backup = _make_backup(note, today)
                 self._api.add(backup)
                 self._load_file(filename, url)
         with status("Loading new note files"):
@@ -133,13 +179,15 @@ class FileSync(ISync):
             updated_notes,
             {nf.url.id for nf in updated_notes if nf.url.id is not None},
             False,
+            self._digests,
+            self._urls,
         )
         return renames
 
     def _load_new_files(self) -> t.Dict[str, str]:
         ret = {}
         logger.debug("Looking for new gkeep notes in %s", self._config.sync_dir)
-        for filename, url in _find_files(self._config):
+        for filename, url in _find_files(self._config, self._urls):
             if url.id is None and self._api.get(url.id) is None:
                 new_filename = create_note_from_file(
                     self._api, self._config, filename, url
@@ -152,10 +200,25 @@ class FileSync(ISync):
         state = self._api.dump()
         logger.debug("Loading gkeep files from %s", self._config.sync_dir)
         ret = []
-        for filename, url in _find_files(self._config):
-            note = self._load_file(filename, url)
-            if note is None or note.dirty:
+        known = []
+        for filename, url in _find_files(self._config, self._urls):
+            if self._api.get(url.id) is None:
                 ret.append(filename)
+            else:
+                known.append((filename, url))
+        if known:
+            # Reading the files is independent, so overlap the I/O in a thread pool.
+            # Parsing modifies the KeepApi, so that stays on this thread.
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_IO_WORKERS, len(known))
+            ) as executor:
+                contents = executor.map(
+                    parser.read_lines, [filename for filename, _ in known]
+                )
+                for (filename, url), lines in zip(known, contents):
+                    note = self._load_file(filename, url, lines)
+                    if note is None or note.dirty:
+                        ret.append(filename)
         # Clear the dirty state from reading in files.
         # We want this first sync to simply update our internal state, and
         # *then* we will process any changes in the note files.
@@ -166,26 +229,79 @@ class FileSync(ISync):
         self,
         filename: str,
         url: NoteUrl,
+        lines: t.Optional[t.Sequence[str]] = None,
     ) -> t.Optional[TopLevelNode]:
         note = self._api.get(url.id)
         if note is None:
             return None
 
-        parser.parse(self._api, self._config, filename, note)
+        parser.parse(
+            self._api, self._config, filename if lines is None else lines, note
+        )
         if not note.title:
             note.title = url.title
         return note
 
 
-def _find_files(config: Config) -> t.Iterator[t.Tuple[str, NoteUrl]]:
+def _find_files(
+    config: Config, urls: t.Optional[t.Dict[str, CachedUrl]] = None
+) -> t.Iterator[t.Tuple[str, NoteUrl]]:
+    """Find all note files in the sync dir
+
+    If urls is passed in, it is used and updated to avoid re-reading the
+    metadata of files that haven't changed
+    """
     if config.sync_dir is None:
         return
-    for root, _, files in os.walk(config.sync_dir):
-        for filename in files:
-            fullpath = os.path.join(root, filename)
-            url = parser.url_from_file(config, fullpath)
-            if url is not None:
-                yield (fullpath, url)
+    yield from _scan_dir(config, config.sync_dir, urls)
+
+
+def _scan_dir(
+    config: Config, directory: str, urls: t.Optional[t.Dict[str, CachedUrl]]
+) -> t.Iterator[t.Tuple[str, NoteUrl]]:
+    # Same traversal as os.walk, but the DirEntry stat lets us reuse cached urls
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            files = []
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                else:
+                    files.append(entry)
+    except OSError:
+        return
+    for entry in files:
+        url = _get_file_url(config, entry, urls)
+        if url is not None:
+            yield (entry.path, url)
+    for subdir in subdirs:
+        yield from _scan_dir(config, subdir, urls)
+
+
+def _get_file_url(
+    config: Config, entry: os.DirEntry, urls: t.Optional[t.Dict[str, CachedUrl]]
+) -> t.Optional[NoteUrl]:
+    ext = os.path.splitext(entry.name)[1].lower()
+    if urls is None or ext not in parser.ALLOWED_EXT:
+        return parser.url_from_file(config, entry.path)
+    try:
+        stat = entry.stat()
+    except OSError:
+        return None
+    cached = urls.get(entry.path)
+    if (
+        cached is None
+        or cached.mtime_ns != stat.st_mtime_ns
+        or cached.size != stat.st_size
+    ):
+        url = parser.url_from_file(config, entry.path)
+        if url is None:
+            return None
+        cached = urls[entry.path] = CachedUrl(url, stat.st_mtime_ns, stat.st_size)
+    # Callers may modify the url, so hand out a copy
+    return NoteUrl(cached.url.id, cached.url.title)
 
 
 def create_note_from_file(
@@ -227,7 +343,7 @@ def create_note_from_file(
     return None
 
 
-def _make_backup(note: TopLevelNode) -> TopLevelNode:
+def _make_backup(note: TopLevelNode, today: t.Optional[date] = None) -> TopLevelNode:
     if isinstance(note, Note):
         backup = Note()
         backup.text = note.text
@@ -242,7 +358,9 @@ def _make_backup(note: TopLevelNode) -> TopLevelNode:
     else:
         raise NotImplementedError
     backup.trash()
-    backup.title = f"[Backup {datetime.now().date()}] {note.title}"
+    if today is None:
+        today = datetime.now().date()
+    backup.title = f"[Backup {today}] {note.title}"
     return backup
 
 
@@ -252,10 +370,15 @@ def _write_files(
     notes: t.Sequence[NoteFile],
     updated_notes: t.Container[str],
     initial_load: bool,
+    digests: t.Optional[t.Dict[str, FileDigest]] = None,
+    urls: t.Optional[t.Dict[str, CachedUrl]] = None,
 ) -> t.Tuple[t.Dict[str, str], t.Sequence[str]]:
     """
     Write updated files to disk, resolving merge conflicts
 
+    If digests and urls are passed in, they are used and updated to avoid
+    re-reading files that haven't changed since they were last seen.
+
     This intentionally does not use KeepApi because it needs to be able to run in a
     background thread while the main thread can still make changes to notes.
     """
@@ -263,10 +386,11 @@ def _write_files(
         return {}, []
     renames = {}
     need_load = []
+    writes: t.List[t.Tuple[str, t.Sequence[str], bool]] = []
 
     # Find all pre-existing note files
     files_by_id = {}
-    for notefile, url in _find_files(config):
+    for notefile, url in _find_files(config, urls):
         if url is not None and url.id:
             files_by_id[url.id] = notefile
 
@@ -300,19 +424,86 @@ def _write_files(
             renames[url.ephemeral_bufname(config, "\n".join(lines))] = new_filepath
 
         assert lines is not None
-        if not os.path.exists(new_filepath):
-            _write_file(new_filepath, lines, False)
-        elif url.id in updated_notes and _content_changed(lines, new_filepath):
-            _write_file(new_filepath, lines, new_filepath in protected_files)
-        elif initial_load and _content_changed(lines, new_filepath):
+        stat = _try_stat(new_filepath)
+        if stat is None:
+            writes.append((new_filepath, lines, False))
+        elif url.id in updated_notes and _content_changed(
+            lines, new_filepath, digests, stat
+        ):
+            writes.append((new_filepath, lines, new_filepath in protected_files))
+        elif initial_load and _content_changed(lines, new_filepath, digests, stat):
             need_load.append(new_filepath)
 
+    if writes:
+        # Like move_files, the writes are independent so run them concurrently
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_IO_WORKERS, len(writes))
+        ) as executor:
+            list(executor.map(_write_file, *zip(*writes)))
+        if digests is not None:
+            for filename, lines, _ in writes:
+                digest = hashlib.md5(_file_content(lines)).hexdigest()
+                digests[filename] = FileDigest.from_stat(digest, os.stat(filename))
+
     if initial_load:
         for oldfile in files_by_id.values():
             _soft_delete(oldfile)
     return renames, need_load
 
 
+def move_files(files: t.Dict[str, str]) -> None:
+    """Rename note files, deleting the ones that became ephemeral
+
+    If no file is renamed onto the path of another file being moved, the operations
+    are run concurrently. This makes a big difference when the sync dir is on slow
+    or network storage. Otherwise (e.g. two notes swapping titles) they are run in
+    an order that doesn't clobber any of the files.
+    """
+    if not files:
+        return
+    if files.keys() & set(files.values()):
+        for src, dst in _order_moves(files):
+            _move_file(src, dst)
+        return
+    with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, len(files))) as executor:
+        # Consume the results so that any exceptions are raised
+        list(executor.map(_move_file, files.keys(), files.values()))
+
+
+def _order_moves(files: t.Dict[str, str]) -> t.List[t.Tuple[str, str]]:
+    """Order renames so that no file is moved onto a path before it has been vacated
+
+    Cycles are broken by first moving one of the files to a temporary name
+    """
+    pending = dict(files)
+    moves = []
+    while pending:
+        ready = [src for src, dst in pending.items() if dst not in pending]
+        if not ready:
+            src = next(iter(pending))
+            tmpfile = src + ".rename"
+            moves.append((src, tmpfile))
+            pending[tmpfile] = pending.pop(src)
+            continue
+        for src in ready:
+            moves.append((src, pending.pop(src)))
+    return moves
+
+
+def _move_file(src: str, dst: str) -> None:
+    if not os.path.exists(src):
+        return
+    if NoteUrl.is_ephemeral(dst):
+        logger.info("Deleting %s", src)
+        os.unlink(src)
+    else:
+        logger.info("Renaming %s -> %s", src, dst)
+        try:
+            os.rename(src, dst)
+        except Exception:
+            logger.exception("Error renaming file %s -> %s", src, dst)
+
+
 def _soft_delete(filename: str) -> None:
     logger.warning("Local file has remote changes. Moving to backup %s", filename)
     os.rename(filename, get_local_file(filename))
@@ -322,18 +513,59 @@ def get_local_file(filename: str) -> str:
     return filename + ".local"
 
 
+def find_local_files(config: Config) -> t.Set[str]:
+    """Paths of all the local backup files, found with one listing per directory"""
+    found = set()
+    for directory in (config.sync_dir, config.archive_sync_dir):
+        if directory is None:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".local"):
+                        found.add(entry.path)
+        except OSError:
+            pass
+    return found
+
+
 def _write_file(filename: str, lines: t.Iterable[str], keep_backup: bool) -> None:
-    if os.path.exists(filename) and keep_backup:
+    if keep_backup and os.path.exists(filename):
         _soft_delete(filename)
     logger.info("Writing %s", filename)
-    with open(filename, "w", encoding="utf-8") as ofile:
-        for line in lines:
-            ofile.write(line)
-            ofile.write("\n")
-
-
-def _content_changed(lines: t.Sequence[str], filename: str) -> bool:
-    return _hash_content(lines) != _hash_file(filename)
+    with open(filename, "wb") as ofile:
+        ofile.write(_file_content(lines))
+
+
+def _try_stat(filename: str) -> t.Optional[os.stat_result]:
+    """Stat a file, or return None if it doesn't exist (like os.path.exists)"""
+    try:
+        return os.stat(filename)
+    except (OSError, ValueError):
+        return None
+
+
+def _content_changed(
+    lines: t.Sequence[str],
+    filename: str,
+    digests: t.Optional[t.Dict[str, FileDigest]] = None,
+    stat: t.Optional[os.stat_result] = None,
+) -> bool:
+    content = _file_content(lines)
+    digest = hashlib.md5(content).hexdigest()
+    if stat is None:
+        stat = os.stat(filename)
+    if digests is not None:
+        known = digests.get(filename)
+        if known is not None and known.matches(stat):
+            return known.digest != digest
+    # Different sizes can be detected without reading the file
+    if stat.st_size != len(content):
+        return True
+    file_digest = _hash_file(filename)
+    if digests is not None:
+        digests[filename] = FileDigest.from_stat(file_digest, stat)
+    return file_digest != digest
 
 
 def _hash_file(filename: str) -> str:
@@ -347,9 +579,5 @@ def _hash_file(filename: str) -> str:
             md5.update(data)
 
 
-def _hash_content(lines: t.Sequence[str]) -> str:
-    md5 = hashlib.md5()
-    for line in lines:
-        md5.update(line.encode("utf-8"))
-        md5.update(b"\n")
-    return md5.hexdigest()
+def _file_content(lines: t.Iterable[str]) -> bytes:
+    return "".join(f"{line}\n" for line in lines).encode("utf-8")
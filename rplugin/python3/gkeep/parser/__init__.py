@@ -18,6 +18,7 @@ __all__ = [
     "TFile",
     "get_ext",
     "get_filetype",
+    "is_note_bufname",
     "parse",
     "read_lines",
     "serialize",
@@ -51,20 +52,24 @@ def ext_from_filetype(filetype: str) -> str:
 
 
 def serialize(
-    config: Config, note: TopLevelNode, filetype: t.Optional[str] = None
-) -> t.Iterator[str]:
+    config: Config,
+    note: TopLevelNode,
+    filetype: t.Optional[str] = None,
+    include_id: bool = True,
+) -> t.List[str]:
+    # Every caller needs the full list of lines, so build it here directly
+    # instead of handing back a generator that wraps another generator
     if filetype is None:
         filetype = get_filetype(config, note)
     if filetype == KEEP_FT:
-        yield from keep.serialize(note)
-        return
+        return list(keep.serialize(note, include_id))
     assert isinstance(note, Note)
 
     if filetype == "norg":
-        yield from neorg.serialize(note)
+        return list(neorg.serialize(note, include_id))
     else:
         logger.warning("Unrecognized filetype %s", filetype)
-        yield from note.text.split("\n")
+        return note.text.split("\n")
 
 
 def convert(note: Note, from_ft: t.Optional[str], to_ft: str) -> None:
@@ -92,6 +97,19 @@ def parse(api: KeepApi, config: Config, file: TFile, note: TopLevelNode) -> None
         keep.parse_note_body(lines, note, 0)
 
 
+def is_note_bufname(config: Config, filename: str) -> bool:
+    """Cheap check for whether a buffer could be a note, without reading it"""
+    if NoteUrl.is_ephemeral(filename):
+        return True
+    elif config.sync_dir is None:
+        return False
+    if not os.path.isabs(filename):
+        filename = os.path.abspath(filename)
+    return (
+        filename.startswith(config.sync_dir) and util.get_ext(filename) in ALLOWED_EXT
+    )
+
+
 def url_from_file(
     config: Config, filename: str, file: t.Optional[TFile] = None
 ) -> t.Optional[NoteUrl]:
@@ -24,7 +24,8 @@ def detect_note_type(filename: str, file: TFile) -> NoteEnum:
         return NoteEnum.NOTE
     lines = read_lines(file, 8)
     for line in lines:
-        if LIST_ITEM_RE.match(line):
+        # Cheap substring check so most lines never reach the regex
+        if "[" in line and LIST_ITEM_RE.match(line):
             return NoteEnum.LIST
     return NoteEnum.NOTE
 
@@ -38,8 +39,8 @@ def toggle_list_item(line: str) -> str:
     return LIST_ITEM_RE.sub(f"\\1[{newcheck}] \\3", line)
 
 
-def serialize(note: TopLevelNode) -> t.Iterator[str]:
-    yield from _gen_header(note)
+def serialize(note: TopLevelNode, include_id: bool = True) -> t.Iterator[str]:
+    yield from _gen_header(note, include_id)
     if isinstance(note, Note):
         yield from _gen_note_body(note)
     elif isinstance(note, List):
@@ -48,15 +49,14 @@ def serialize(note: TopLevelNode) -> t.Iterator[str]:
         raise ValueError(f"Unknown note type {type(note)}")
 
 
-def _gen_header(note: TopLevelNode) -> t.Iterator[str]:
+def _gen_header(note: TopLevelNode, include_id: bool = True) -> t.Iterator[str]:
     yield f"# {note.title}"
-    yield f"id: {note.id}"
-    labels = []
-    for label in note.labels.all():
-        if "," in label.name:
-            labels.append(f'"{label.name}"')
-        else:
-            labels.append(label.name)
+    if include_id:
+        yield f"id: {note.id}"
+    labels = [
+        f'"{label.name}"' if "," in label.name else label.name
+        for label in note.labels.all()
+    ]
     if labels:
         yield "labels: " + ", ".join(labels)
     yield ""
@@ -230,14 +230,17 @@ def _parse_list_body(lines: t.Sequence[str], note: List, start: int) -> None:
     new_items = []
     last_sort: t.Optional[int] = None
     resort = False
+    # Bind the pattern methods locally; this loop runs once per line of the note
+    match_item = LIST_ITEM_RE.match
+    match_space = SPACE_RE.match
     for i in range(start, len(lines)):
         line = lines[i]
-        match = LIST_ITEM_RE.match(line)
+        match = match_item(line)
         if match:
             indented = bool(match[1])
             checked = match[2].lower() == "x"
             text = match[3]
-        elif SPACE_RE.match(line):
+        elif match_space(line):
             continue
         else:
             indented = line.startswith(" ")
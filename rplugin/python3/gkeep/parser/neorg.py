@@ -2,6 +2,7 @@ import getpass
 import logging
 import re
 import typing as t
+from functools import lru_cache
 
 from gkeep.api import KeepApi
 from gkeep.parser.common import Header, TFile, merge_labels, read_lines
@@ -87,7 +88,9 @@ def parse_meta(file: TFile) -> t.Optional[t.Dict[str, str]]:
 
 
 def write_meta(
-    lines: t.Iterable[str], meta: t.Optional[t.Dict[str, str]]
+    lines: t.Iterable[str],
+    meta: t.Optional[t.Dict[str, str]],
+    remove: t.Container[str] = (),
 ) -> t.Iterable[str]:
     in_meta = False
     seen = set()
@@ -109,26 +112,35 @@ def write_meta(
             else:
                 key, val = [l.strip() for l in line.split(":", 1)]
                 seen.add(key)
+                if key in remove:
+                    continue
                 if key in meta and val != meta[key]:
                     yield f"\t{key}: {meta[key]}"
                     continue
         yield line
 
 
-def create_meta(note: Note) -> t.List[str]:
-    categories = " ".join([l.name for l in note.labels.all()])
-    return [
+@lru_cache(maxsize=None)
+def _get_user() -> str:
+    # getuser can hit the password database, and the answer won't change
+    return getpass.getuser()
+
+
+def create_meta(note: Note, include_id: bool = True) -> t.List[str]:
+    categories = " ".join(l.name for l in note.labels.all())
+    meta = [
         "@document.meta",
         f"\ttitle: {note.title}",
         "\tdescription:",
-        f"\tauthor: {getpass.getuser()}",
+        f"\tauthor: {_get_user()}",
         f"\tcategories: {categories}",
         f"\tcreated: {note.timestamps.created.date().isoformat()}",
         "\tversion: 0.1",
-        f"\tgkeep: {note.id}",
-        "@end",
-        "",
     ]
+    if include_id:
+        meta.append(f"\tgkeep: {note.id}")
+    meta.extend(["@end", ""])
+    return meta
 
 
 def get_metadata(file: TFile) -> Header:
@@ -136,15 +148,20 @@ def get_metadata(file: TFile) -> Header:
     return Header(meta.get("gkeep"), meta.get("title"))
 
 
-def serialize(note: Note) -> t.Iterator[str]:
+def serialize(note: Note, include_id: bool = True) -> t.Iterator[str]:
     lines = note.text.split("\n")
     meta = parse_meta(lines)
     if meta is not None:
-        meta["gkeep"] = note.id
+        remove = set()
+        if include_id:
+            meta["gkeep"] = note.id
+        else:
+            meta.pop("gkeep", None)
+            remove.add("gkeep")
         # TODO add labels to categories
-        yield from write_meta(lines, meta)
+        yield from write_meta(lines, meta, remove)
     else:
-        yield from create_meta(note)
+        yield from create_meta(note, include_id)
         yield from lines
 
 
@@ -1,6 +1,7 @@
 import logging
 import logging.handlers
 import os
+import queue
 import re
 import sys
 import time
@@ -27,6 +28,7 @@ from gkeep.views import menu, notelist, notepopup, noteview
 from gkeep.views.menu import Position
 from gkeepapi.exception import LoginException
 from gkeepapi.node import List, TopLevelNode
+from pynvim.api import Buffer
 
 if sys.version_info < (3, 8):
     from typing_extensions import TypedDict
@@ -34,7 +36,13 @@ else:
     from typing import TypedDict
 
 logger = logging.getLogger(__name__)
-LINK_RE = re.compile(r"\[[^\]]*\]\(([^\)]*)\)")
+# How long to wait for more writes before syncing a saved note
+SYNC_DEBOUNCE = 0.5
+# Seconds between periodic syncs
+SYNC_INTERVAL = 10
+# Links never span lines, so this can be run over a whole buffer at once
+LINK_RE = re.compile(r"\[[^\]\n]*\]\(([^\)\n]*)\)")
+ARG_DELIMITER_RE = re.compile(" +")
 
 
 F = t.TypeVar("F", bound=t.Callable[..., t.Any])
@@ -50,7 +58,26 @@ def unwrap_args(f: F) -> F:
     return d  # type: ignore[return-value]
 
 
+def unwrap_rpc_args(f: F) -> F:
+    """Like unwrap_args, for handlers that are only ever called by pynvim
+
+    pynvim always passes the function arguments as a single list, so there's no need
+    to check for it.
+    """
+
+    @wraps(f)
+    def d(self: t.Any, args: t.List[t.Any]) -> t.Any:
+        return f(self, *args)
+
+    return d  # type: ignore[return-value]
+
+
 NOTES_GLOB = ",".join(["*" + ext for ext in ALLOWED_EXT])
+# These option lists are fixed, so build them once instead of on every completion
+POSITION_OPTIONS = [p.value for p in Position]
+ENTER_TARGET_OPTIONS = ["menu", "list"]
+NOTE_FORMAT_OPTIONS = [NoteFormat.NOTE.value, NoteFormat.LIST.value]
+NEORG_NOTE_FORMAT_OPTIONS = NOTE_FORMAT_OPTIONS + [NoteFormat.NEORG.value]
 
 A = t.TypeVar("A", bound=t.Callable[..., None])
 
@@ -98,37 +125,42 @@ class GkeepPlugin:
             "%(levelname)s %(asctime)s [%(name)s] %(message)s"
         )
         handler.setFormatter(formatter)
+        # Write the log from a dedicated thread so that logging calls from the
+        # background threads never block on disk I/O
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self._log_listener = logging.handlers.QueueListener(
+            log_queue, handler, respect_handler_level=True
+        )
+        self._log_listener.start()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
         log = logging.getLogger("gkeep")
         log.setLevel(logging.ERROR)
-        log.addHandler(handler)
+        log.addHandler(queue_handler)
         log = logging.getLogger("gkeepapi")
         log.setLevel(logging.ERROR)
-        log.addHandler(handler)
+        log.addHandler(queue_handler)
         self._config = Config.from_vim(vim)
         for logname, level in self._config.log_levels.items():
             logging.getLogger(logname).setLevel(level)
         self._api = KeepApi()
-        self._modal = gkeep.modal.Modal(vim)
-        self._noteview = noteview.NoteView(vim, self._config, self._api)
-        self._notelist = notelist.NoteList(
-            vim, self._config, self._api, self._modal, self._noteview
-        )
-        self._notepopup = notepopup.NotePopup(
-            vim, self._config, self._api, self._modal, self._noteview
-        )
-        self._menu = menu.Menu(
-            vim, self._config, self._api, self._modal, self._notelist
-        )
+        # The icons can't change after startup, so look up the ones used for search
+        # results once
+        self._result_icons = {
+            name: self._config.get_icon(name)
+            for name in ("list", "note", "trashed", "archived")
+        }
         if self._config.sync_dir:
             vim.command("au BufNew *.keep call _gkeep_set_note_type(expand('<abuf>'))")
             vim.command(
-                f"au BufWritePost {NOTES_GLOB} call _gkeep_sync_file(expand('<abuf>'))"
+                f"au BufWritePost {NOTES_GLOB} call _gkeep_sync_file(expand('<abuf>'), expand('<afile>:p'))"
             )
         if self._config.support_neorg:
             vim.command(
-                f"au BufWritePre {NOTES_GLOB} call _gkeep_buf_write_pre(expand('<abuf>'))"
+                f"au BufWritePre {NOTES_GLOB} call _gkeep_buf_write_pre(expand('<abuf>'), expand('<afile>:p'))"
             )
         self.dispatch = partial(util.dispatch, self._vim, self._config)
+        self._dispatch_finish_sync = partial(self.dispatch, "finish_sync")
+        self._dispatch_sync_error = partial(self.dispatch, "handle_sync_error")
         # The first exec_lua call takes a while in menu.render, but for some reason
         # calling it here is very fast and prevents the delay later.
         self._vim.exec_lua("(function() end)()")
@@ -137,6 +169,19 @@ class GkeepPlugin:
         else:
             self._sync = fssync.NoopSync(self._api)
         self._start_callbacks: t.List[t.Callable[[], None]] = []
+        # Map of buffer number to ((bufname, changedtick), url)
+        self._url_cache: t.Dict[
+            int, t.Tuple[t.Tuple[str, int], t.Optional[NoteUrl]]
+        ] = {}
+        # Cached response for _gkeep_all_notes. Cleared whenever the notes may change.
+        self._note_results: t.Optional[t.List[t.Dict]] = None
+        # Map of email to master token, so we only go to the keyring once
+        self._token_cache: t.Dict[str, str] = {}
+        self._event_handlers: t.Dict[str, t.Callable[..., None]] = {
+            name[len("event_") :]: getattr(self, name)
+            for name in dir(self)
+            if name.startswith("event_")
+        }
         # The keyrings.alt backend will prompt the user for a password when setting up,
         # but that will always fail (see https://github.com/stevearc/gkeep.nvim/issues/12)
         # Monkey patch it to prompt the user inside of neovim instead.
@@ -144,15 +189,57 @@ class GkeepPlugin:
 
         getpass.getpass = lambda msg: vim.call("inputsecret", msg)  # type: ignore
 
+    # The views are created on first use (see __getattr__) so that starting nvim
+    # doesn't pay for them, or the menu's status thread, if Gkeep is never opened.
+    # They can't be properties because pynvim calls getattr() on every member of
+    # the plugin when discovering handlers.
+    _modal: gkeep.modal.Modal
+    _noteview: noteview.NoteView
+    _notelist: notelist.NoteList
+    _notepopup: notepopup.NotePopup
+    _menu: menu.Menu
+
+    def __getattr__(self, name: str) -> t.Any:
+        if name == "_modal":
+            value: t.Any = gkeep.modal.Modal(self._vim)
+        elif name == "_noteview":
+            value = noteview.NoteView(self._vim, self._config, self._api)
+        elif name == "_notelist":
+            value = notelist.NoteList(
+                self._vim, self._config, self._api, self._modal, self._noteview
+            )
+        elif name == "_notepopup":
+            value = notepopup.NotePopup(
+                self._vim, self._config, self._api, self._modal, self._noteview
+            )
+        elif name == "_menu":
+            value = menu.Menu(
+                self._vim, self._config, self._api, self._modal, self._notelist
+            )
+        else:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        setattr(self, name, value)
+        return value
+
     @pynvim.shutdown_hook
     def on_shutdown(self) -> None:
         self._config.state = State.ShuttingDown
-
-    @background(max_waiting=0)
-    def sync_bg_thread(self) -> None:
-        while self._config.state != State.ShuttingDown:
-            time.sleep(10)
-            self.dispatch("sync")
+        # Don't construct the menu just to stop its timer
+        menu_view = self.__dict__.get("_menu")
+        if menu_view is not None:
+            menu_view.stop_status_timer()
+        self._log_listener.stop()
+
+    def _schedule_sync(self) -> None:
+        """Sync soon, coalescing with any other sync requests that come in"""
+        self._note_results = None
+        self._vim.exec_lua(
+            "require'gkeep'.schedule_sync(...)",
+            int(SYNC_DEBOUNCE * 1000),
+            async_=True,
+        )
 
     @pynvim.function("_gkeep_health", sync=True)
     @unwrap_args
@@ -198,7 +285,7 @@ class GkeepPlugin:
     def _gkeep_complete_position(
         self, arg_lead: str, _line: str, _cursor_pos: int
     ) -> t.List[str]:
-        return _complete_arg_list(arg_lead, [p.value for p in Position])
+        return _complete_arg_list(arg_lead, POSITION_OPTIONS)
 
     @pynvim.function("_gkeep_preload")
     @unwrap_args
@@ -206,25 +293,32 @@ class GkeepPlugin:
     def preload(self) -> None:
         email = self._config.email
         if email is not None and not self._api.is_logged_in:
-            token = keyring.get_password("google-keep-token", email)
+            token = self._get_token(email)
             if token:
                 state = self._config.load_state()
                 self._resume(email, token, state)
 
+    def _get_token(self, email: str) -> t.Optional[str]:
+        token = self._token_cache.get(email)
+        if token is None:
+            token = keyring.get_password("google-keep-token", email)
+            if token:
+                self._token_cache[email] = token
+        return token
+
     @pynvim.function("_gkeep_preload_if_any_open")
     @unwrap_args
     def preload_if_any_open(self) -> None:
-        for buffer in self._vim.buffers:
-            if NoteUrl.is_ephemeral(buffer.name):
-                self.preload()
-                return
+        buffers = self._vim.exec_lua("return require('gkeep').get_buffer_names()")
+        if any(NoteUrl.is_ephemeral(bufname) for _, bufname in buffers):
+            self.preload()
 
     @pynvim.function("_gkeep_dispatch", sync=True)
-    @unwrap_args
+    @unwrap_rpc_args
     def dispatch_event(self, event: str, *args: t.Any) -> None:
-        meth = f"event_{event}"
-        if hasattr(self, meth):
-            getattr(self, meth)(*args)
+        handler = self._event_handlers.get(event)
+        if handler is not None:
+            handler(*args)
         else:
             util.echoerr(self._vim, f"Unknown Gkeep event '{event}'")
 
@@ -241,10 +335,7 @@ class GkeepPlugin:
         logger.info("Resuming gkeep session for %s", email)
         self._sync.start(state)
         self._config.state = State.InitialSync
-        self._api.sync(
-            self._finish_initial_sync,
-            partial(self.dispatch, "handle_sync_error"),
-        )
+        self._api.sync(self._finish_initial_sync, self._dispatch_sync_error)
         self.dispatch("refresh", True)
 
     def _finish_initial_sync(
@@ -255,6 +346,7 @@ class GkeepPlugin:
         nodes: t.Sequence[t.Any],
     ) -> None:
         updated_notes = self._api.apply_updates(resync, keep_version, user_info, nodes)
+        self._note_results = None
         self._config.save_state(self._api.dump())
         logger.debug("Startup sync complete. Updated %d notes", len(updated_notes))
         renames = self._sync.finish_startup(updated_notes)
@@ -263,22 +355,27 @@ class GkeepPlugin:
         self.dispatch("refresh", True)
         self.dispatch("sync")
         self.dispatch("on_start")
-        self.sync_bg_thread()
+        self._vim.async_call(
+            self._vim.exec_lua,
+            "require'gkeep'.start_sync_timer(...)",
+            SYNC_INTERVAL * 1000,
+        )
 
     @require_state(State.Running)
     def event_sync(self, resync: bool = False, force: bool = False) -> None:
         # We may have opened vim on a note file. If so, we will need to set the
         # note_type once the api has loaded
         self._set_note_type(self._vim.current.buffer.number)
+        # Every local change to the notes is followed by a sync
+        self._note_results = None
 
         if not force and not resync and not self._api.is_dirty:
             return
+        self._start_sync(resync)
+
+    def _start_sync(self, resync: bool = False) -> None:
         logger.debug("Syncing gkeep %s", "(force refresh)" if resync else "")
-        self._api.sync(
-            partial(self.dispatch, "finish_sync"),
-            partial(self.dispatch, "handle_sync_error"),
-            resync,
-        )
+        self._api.sync(self._dispatch_finish_sync, self._dispatch_sync_error, resync)
 
     def event_handle_sync_error(self, error: str) -> None:
         logger.error("Got error during sync: %s\n  deactivating gkeep!", error)
@@ -295,26 +392,49 @@ class GkeepPlugin:
         user_info: t.Any,
         nodes: t.Sequence[t.Any],
     ) -> None:
-        # If any notes/labels were changed during sync, process & queue those changes
-        self.event_sync()
+        # If any notes/labels were changed during sync, send those changes now.
+        # apply_updates would overwrite them, so they can't wait for the sync timer.
+        if self._api.is_dirty:
+            self._start_sync()
         updated_notes = self._api.apply_updates(resync, keep_version, user_info, nodes)
+        self._note_results = None
         self.event_refresh(resync)
         self._config.save_state(self._api.dump())
         logger.debug("Sync complete. Updated %d notes", len(updated_notes))
-        notes = []
-        for id in updated_notes:
-            note = self._api.get(id)
-            if note is not None:
-                notes.append(fssync.NoteFile.from_note(self._api, self._config, note))
+        if not updated_notes:
+            return
 
         # Only rerender the ephemeral buffers. Note files are updated directly.
-        for bufnr in self._vim.buffers:
-            bufname = bufnr.name
-            if NoteUrl.is_ephemeral(bufname):
-                url = NoteUrl.from_ephemeral_bufname(bufname)
-                if url.id in updated_notes and not bufnr.options["modified"]:
-                    self._noteview.render(bufnr, url)
-        self._write_files(notes)
+        for bufnr, bufname, url in self._get_unmodified_ephemeral_buffers():
+            if url.id in updated_notes:
+                self._noteview.render(bufnr, url, bufname)
+
+        # Only the file sync consumes the NoteFiles, so don't build them otherwise
+        if self._config.sync_dir:
+            notes = []
+            for id in updated_notes:
+                note = self._api.get(id)
+                if note is not None:
+                    notes.append(
+                        fssync.NoteFile.from_note(self._api, self._config, note)
+                    )
+            self._write_files(notes)
+
+    def _get_unmodified_ephemeral_buffers(
+        self,
+    ) -> t.List[t.Tuple[Buffer, str, NoteUrl]]:
+        buffers = list(self._vim.buffers)
+        # Fetch the names and modified flags of all buffers in a single request
+        calls: t.List[util.AtomicCall] = []
+        for bufnr in buffers:
+            calls.append(("nvim_buf_get_name", [bufnr]))
+            calls.append(("nvim_buf_get_option", [bufnr, "modified"]))
+        results = util.call_atomic(self._vim, calls)
+        ret = []
+        for bufnr, bufname, modified in zip(buffers, results[::2], results[1::2]):
+            if NoteUrl.is_ephemeral(bufname) and not modified:
+                ret.append((bufnr, bufname, NoteUrl.from_ephemeral_bufname(bufname)))
+        return ret
 
     @background
     def _write_files(self, updated_notes: t.Sequence[fssync.NoteFile]) -> None:
@@ -342,16 +462,13 @@ class GkeepPlugin:
         # and now is a good time to re-poll to make sure the values are up-to-date.
         self._config.reload_from_vim(self._vim)
         # Rerender any ephemeral buffers that are open
-        for bufnr in self._vim.buffers:
-            bufname = bufnr.name
-            if NoteUrl.is_ephemeral(bufname) and not bufnr.options["modified"]:
-                url = NoteUrl.from_ephemeral_bufname(bufname)
-                self._noteview.render(bufnr, url)
+        for bufnr, bufname, url in self._get_unmodified_ephemeral_buffers():
+            self._noteview.render(bufnr, url, bufname)
         for cb in self._start_callbacks:
             cb()
 
     @pynvim.function("_gkeep_list_action", sync=True)
-    @unwrap_args
+    @unwrap_rpc_args
     @require_state(State.InitialSync, State.Running)
     def list_action(self, action: str, *args: t.Any) -> None:
         # Only allow read actions until state is Running
@@ -361,25 +478,25 @@ class GkeepPlugin:
         self._notelist.action(action, *args)
 
     @pynvim.function("_gkeep_popup_action", sync=True)
-    @unwrap_args
+    @unwrap_rpc_args
     @require_state(State.Running)
     def popup_action(self, action: str, *args: t.Any) -> None:
         self._notepopup.action(action, *args)
 
     @pynvim.function("_gkeep_menu_action", sync=True)
-    @unwrap_args
+    @unwrap_rpc_args
     @require_state(inv=[State.ShuttingDown])
     def menu_action(self, action: str, *args: t.Any) -> None:
         self._menu.action(action, *args)
 
     @pynvim.function("_gkeep_modal", sync=True)
-    @unwrap_args
+    @unwrap_rpc_args
     @require_state(inv=[State.ShuttingDown])
     def modal_action(self, mtype: str, meth: str, *args: t.Any) -> None:
         self._modal.action(mtype, meth, *args)
 
     @pynvim.function("_gkeep_prompt_close", sync=True)
-    @unwrap_args
+    @unwrap_rpc_args
     @require_state(inv=[State.ShuttingDown])
     def close_prompt(self, text: t.Optional[str] = None) -> None:
         self._modal.prompt.close(text)
@@ -415,21 +532,34 @@ class GkeepPlugin:
     def _load_note(self, address: str) -> None:
         bufnr = self._vim.current.buffer
         url = NoteUrl.from_ephemeral_bufname(address)
-        self._vim.command(f"silent doau BufReadPre {url}")
         # Undo should not return to a blank buffer
         # Method taken from :h clear-undo
-        level = bufnr.options["undolevels"]
-        bufnr.options["undolevels"] = -1
-        self._noteview.render(bufnr, url)
+        _, level, _ = util.call_atomic(
+            self._vim,
+            [
+                ("nvim_command", [f"silent doau BufReadPre {url}"]),
+                ("nvim_buf_get_option", [bufnr, "undolevels"]),
+                ("nvim_buf_set_option", [bufnr, "undolevels", -1]),
+            ],
+        )
+        self._noteview.render(bufnr, url, address)
         # Not sure how this could happen, but the undolevels were so high that it was
         # crashing when we tried to set it back
         if level > 100000:
             level = 100000
-        bufnr.options["undolevels"] = level
 
-        self._vim.command(f"silent doau BufReadPost {url}")
-        ext = util.get_ext(bufnr.name)[1:]
-        self._vim.exec_lua("require('gkeep').on_ephemeral_buf_read(...)", ext)
+        ext = util.get_ext(address)[1:]
+        util.call_atomic(
+            self._vim,
+            [
+                ("nvim_buf_set_option", [bufnr, "undolevels", level]),
+                ("nvim_command", [f"silent doau BufReadPost {url}"]),
+                (
+                    "nvim_exec_lua",
+                    ["require('gkeep').on_ephemeral_buf_read(...)", [ext]],
+                ),
+            ],
+        )
 
     @pynvim.autocmd("BufWriteCmd", "gkeep://*", eval='expand("<abuf>")', sync=True)
     @require_state(State.InitialSync, State.Running, log=True)
@@ -444,27 +574,39 @@ class GkeepPlugin:
             return
         self._noteview.save_buffer(bufnr)
         self._notelist.rerender_note(url.id)
-        self._vim.command(f"silent doau BufWritePre {url}")
-        bufnr.options["modified"] = False
-        self._vim.command(f"silent doau BufWritePost {url}")
-        self.event_sync()
+        util.call_atomic(
+            self._vim,
+            [
+                ("nvim_command", [f"silent doau BufWritePre {url}"]),
+                ("nvim_buf_set_option", [bufnr, "modified", False]),
+                ("nvim_command", [f"silent doau BufWritePost {url}"]),
+            ],
+        )
+        self._schedule_sync()
 
     @pynvim.autocmd("BufEnter", "*", eval='expand("<abuf>")', sync=True)
     @require_state(State.InitialSync, State.Running)
     def _on_buf_enter(self, bufnrstr: str) -> None:
         bufnr = self._vim.buffers[int(bufnrstr)]
-        self._set_note_type(bufnrstr)
-        self._notelist.update_highlight_and_preview(bufnr)
+        bufname = bufnr.name
+        # This fires for every buffer, so skip the note lookup for anything that
+        # can't possibly be a note
+        if parser.is_note_bufname(self._config, bufname):
+            self._set_buffer_note_type(bufnr, bufname)
+        self._notelist.update_highlight_and_preview(bufnr, bufname)
 
     @pynvim.function("_gkeep_buf_write_pre", sync=True)
     @unwrap_args
     @require_state(State.Running)
-    def _on_buf_write_pre(self, bufnr_str: str) -> None:
+    def _on_buf_write_pre(self, bufnr_str: str, filename: str) -> None:
+        # Filter out other files before making any requests to nvim
+        if not parser.is_note_bufname(self._config, filename):
+            return
         bufnr = self._vim.buffers[int(bufnr_str)]
-        url = parser.url_from_file(self._config, bufnr.name, bufnr)
+        bufname = bufnr.name
+        url = self._get_buffer_url(bufnr, bufname)
         if url is None or url.id is not None:
             return
-        bufname = bufnr.name
         new_bufname = fssync.create_note_from_file(
             self._api, self._config, bufname, url, bufnr
         )
@@ -475,18 +617,20 @@ class GkeepPlugin:
     @pynvim.function("_gkeep_sync_file", sync=True)
     @unwrap_args
     @require_state(State.Running)
-    def _maybe_sync(self, bufnr_str: str) -> None:
+    def _maybe_sync(self, bufnr_str: str, filename: str) -> None:
         """Called when saving a buffer
 
         Detects if note buffer and, if so, parses & syncs the note
         """
-        if not self._config.sync_dir:
+        if not self._config.sync_dir or not parser.is_note_bufname(
+            self._config, filename
+        ):
             return
         bufnr = self._vim.buffers[int(bufnr_str)]
         bufname = bufnr.name
         if NoteUrl.is_ephemeral(bufname):
             return
-        url = parser.url_from_file(self._config, bufnr.name, bufnr)
+        url = self._get_buffer_url(bufnr, bufname)
         if url is None:
             return
         note = self._api.get(url.id)
@@ -500,7 +644,7 @@ class GkeepPlugin:
             parser.parse(self._api, self._config, bufnr, note)
         self._noteview.render(bufnr, NoteUrl.from_note(note))
         self._notelist.rerender_note(note.id)
-        self.event_sync()
+        self._schedule_sync()
 
     @pynvim.function("_gkeep_set_note_type", sync=True)
     @unwrap_args
@@ -509,22 +653,45 @@ class GkeepPlugin:
         if not self._config.sync_dir:
             return
         bufnr = self._vim.buffers[int(bufnr_str)]
-        url = parser.url_from_file(self._config, bufnr.name, bufnr)
+        self._set_buffer_note_type(bufnr, bufnr.name)
+
+    def _set_buffer_note_type(self, bufnr: Buffer, bufname: str) -> None:
+        if not self._config.sync_dir:
+            return
+        url = self._get_buffer_url(bufnr, bufname)
         if url is not None:
             note = self._api.get(url.id)
             if note is not None:
                 util.set_note_opts_and_vars(note, bufnr)
 
+    def _get_buffer_url(self, bufnr: Buffer, bufname: str) -> t.Optional[NoteUrl]:
+        """Get the NoteUrl for a buffer, reusing the last result if it is unchanged
+
+        Parsing the url from a note file requires reading the buffer header, and the
+        same buffer gets looked up repeatedly when saving and entering it.
+        """
+        if not parser.is_note_bufname(self._config, bufname):
+            return None
+        elif NoteUrl.is_ephemeral(bufname):
+            return NoteUrl.from_ephemeral_bufname(bufname)
+        key = (bufname, bufnr.api.get_changedtick())
+        cached = self._url_cache.get(bufnr.number)
+        if cached is not None and cached[0] == key:
+            url = cached[1]
+        else:
+            url = parser.url_from_file(self._config, bufname, bufnr)
+            self._url_cache[bufnr.number] = (key, url)
+        # Callers are allowed to mutate the url, so hand out a copy
+        return None if url is None else NoteUrl(url.id, url.title)
+
     def _note_to_result(self, note: TopLevelNode) -> t.Dict:
+        icons = self._result_icons
         url = NoteUrl.from_note(note)
-        if isinstance(note, List):
-            icon = self._config.get_icon("list")
-        else:
-            icon = self._config.get_icon("note")
+        icon = icons["list"] if isinstance(note, List) else icons["note"]
         if note.trashed:
-            icon2 = self._config.get_icon("trashed")
+            icon2 = icons["trashed"]
         elif note.archived:
-            icon2 = self._config.get_icon("archived")
+            icon2 = icons["archived"]
         else:
             icon2 = ""
         return {
@@ -542,6 +709,8 @@ class GkeepPlugin:
         query = Query(querystr)
 
         def respond() -> None:
+            # This is called from the search thread, so only the final callback
+            # needs to be sent back to the main thread
             results = self._api.get_search(query)
             notes = [self._note_to_result(n) for n in results]
             self._vim.async_call(
@@ -549,7 +718,9 @@ class GkeepPlugin:
             )
 
         if self._config.state not in (State.InitialSync, State.Running):
-            respond()
+            self._vim.async_call(
+                self._vim.exec_lua, callback, querystr, query.match_str, []
+            )
             return
         self._api.run_search(query, respond)
 
@@ -558,7 +729,9 @@ class GkeepPlugin:
     def get_titles(self) -> t.Optional[t.List[t.Dict]]:
         if self._config.state not in (State.InitialSync, State.Running):
             return None
-        return [self._note_to_result(n) for n in self._api.all()]
+        if self._note_results is None:
+            self._note_results = [self._note_to_result(n) for n in self._api.all()]
+        return self._note_results
 
     @pynvim.function("_gkeep_render_note", sync=True)
     @unwrap_args
@@ -573,32 +746,28 @@ class GkeepPlugin:
 
     @require_state(State.Running)
     def event_rename_files(self, files: t.Dict[str, str]) -> None:
+        self._url_cache.clear()
+        # Startup dispatches this even when there is nothing to rename
+        if not files:
+            return
         open_buffers = []
-        # Separate the files that nvim has open
-        for buffer in self._vim.buffers:
-            if not buffer.valid:
-                continue
-            bufname = buffer.name
+        set_names = []
+        # Separate the files that nvim has open. Fetch all the buffer names in a
+        # single request instead of querying each buffer individually.
+        buffers = self._vim.exec_lua("return require('gkeep').get_buffer_names()")
+        for bufnr, bufname in buffers:
             dst = files.pop(bufname, None)
             if dst is None:
                 continue
             if NoteUrl.is_ephemeral(dst):
-                buffer.name = dst
+                set_names.append(("nvim_buf_set_name", [bufnr, dst]))
             else:
-                open_buffers.append((buffer, bufname, dst))
+                open_buffers.append((bufnr, bufname, dst))
+        if set_names:
+            util.call_atomic(self._vim, set_names)
 
         # Rename all files that are not open in vim
-        for src, dst in files.items():
-            if os.path.exists(src):
-                if NoteUrl.is_ephemeral(dst):
-                    logger.info("Deleting %s", src)
-                    os.unlink(src)
-                else:
-                    logger.info("Renaming %s -> %s", src, dst)
-                    try:
-                        os.rename(src, dst)
-                    except Exception:
-                        logger.exception("Error renaming file %s -> %s", src, dst)
+        fssync.move_files(files)
 
         # I tried doing this logic in python, but any combination of bufadd(),
         # bufload(), :edit, or anything else caused a segfault as soon as I tried to
@@ -613,6 +782,7 @@ class GkeepPlugin:
     def _reset_all_state(self) -> None:
         self._config.state = State.Uninitialized
         self._config.delete_state()
+        self._note_results = None
         self._api.logout()
         self._menu.refresh(True)
 
@@ -623,6 +793,7 @@ class GkeepPlugin:
         logger.debug("Logging out")
         email = self._config.email
         if email is not None:
+            self._token_cache.pop(email, None)
             try:
                 keyring.delete_password("google-keep-token", email)
             except keyring.errors.PasswordDeleteError:
@@ -650,13 +821,14 @@ class GkeepPlugin:
         if self._config.state == State.Running:
             self._reset_all_state()
 
-        token = keyring.get_password("google-keep-token", email)
+        token = self._get_token(email)
         if token:
             # Call resume directly first so that we can catch credential errors
             try:
                 self._api.resume(email, token, state=None, sync=False)
             except LoginException as e:
                 if e.args[0] == "BadAuthentication":
+                    self._token_cache.pop(email, None)
                     keyring.delete_password("google-keep-token", email)
                     logger.exception(
                         "Gkeep failed to log in with token. Removing token and re-prompting login."
@@ -703,6 +875,7 @@ class GkeepPlugin:
             token = self._api.getMasterToken()
             assert token is not None
             keyring.set_password("google-keep-token", email, token)
+            self._token_cache[email] = token
             self._resume(email, token, None)
         self._vim.out_write(f"Gkeep logged in {email}\n")
 
@@ -731,15 +904,16 @@ class GkeepPlugin:
         self, arg_lead: str, line: str, cursor_pos: int
     ) -> t.List[str]:
         return _complete_multi_arg_list(
-            arg_lead, line, cursor_pos, ["menu", "list"], [p.value for p in Position]
+            arg_lead, line, cursor_pos, ENTER_TARGET_OPTIONS, POSITION_OPTIONS
         )
 
     @pynvim.command("GkeepGoto", sync=True)
     @require_state(State.Running)
     @unwrap_args
     def cmd_goto(self) -> None:
-        lnum, col = self._vim.current.window.cursor
-        line = self._vim.current.buffer[lnum - 1]
+        (_, col), line = util.call_atomic(
+            self._vim, [("nvim_win_get_cursor", [0]), ("nvim_get_current_line", [])]
+        )
         note_id = self._find_markdown_link(line, col)
         if note_id is None:
             note_id = self._find_url_link(line, col)
@@ -812,12 +986,11 @@ class GkeepPlugin:
     def _gkeep_complete_new(
         self, arg_lead: str, line: str, cursor_pos: int
     ) -> t.List[str]:
-        formats = [NoteFormat.NOTE, NoteFormat.LIST]
         if self._config.support_neorg:
-            formats.append(NoteFormat.NEORG)
-        return _complete_multi_arg_list(
-            arg_lead, line, cursor_pos, [p.value for p in formats]
-        )
+            formats = NEORG_NOTE_FORMAT_OPTIONS
+        else:
+            formats = NOTE_FORMAT_OPTIONS
+        return _complete_multi_arg_list(arg_lead, line, cursor_pos, formats)
 
     @require_state(State.Running, log=True)
     def _new_note(
@@ -834,49 +1007,60 @@ class GkeepPlugin:
             util.echoerr(self._vim, "Google Keep note not found")
             return
         line = f"[{note.title}]({note.id})"
-        self._vim.funcs.setreg("x", line)
-        self._vim.funcs.setreg("", line)
-        if "unnamedplus" in self._vim.options["clipboard"]:
-            self._vim.funcs.setreg("+", line)
-        elif "unnamed" in self._vim.options["clipboard"]:
-            self._vim.funcs.setreg("*", line)
+        self._vim.exec_lua("require('gkeep').yank(...)", line)
 
     @pynvim.command("GkeepUpdateLinks", sync=True)
     @require_state(State.Running)
     def cmd_update_links(self) -> None:
         buffer = self._vim.current.buffer
         lines = buffer[:]
+        # Map of note id to the updated link text, or None if the note is unknown
+        links: t.Dict[str, t.Optional[str]] = {}
 
         def update_link(match: re.Match) -> str:
-            note = self._api.get(match[1])
-            if note is not None:
-                return f"[{note.title}]({note.id})"
-            return match[0]
+            id = match[1]
+            if id in links:
+                link = links[id]
+            else:
+                note = self._api.get(id)
+                link = links[id] = (
+                    None if note is None else f"[{note.title}]({note.id})"
+                )
+            return match[0] if link is None else link
 
-        for i, line in enumerate(lines):
-            new_line = LINK_RE.sub(update_link, line)
-            if line != new_line:
-                buffer[i] = new_line
+        text = "\n".join(lines)
+        new_text = LINK_RE.sub(update_link, text)
+        if new_text == text:
+            return
+        # Write back only the changed range, in a single call
+        new_lines = new_text.split("\n")
+        n = min(len(lines), len(new_lines))
+        start = 0
+        while start < n and lines[start] == new_lines[start]:
+            start += 1
+        end = 0
+        while end < n - start and lines[-1 - end] == new_lines[-1 - end]:
+            end += 1
+        buffer[start : len(lines) - end] = new_lines[start : len(new_lines) - end]
 
     def _find_markdown_link(self, line: str, col: int) -> t.Optional[str]:
-        try:
-            link_start = line.rindex("[", 0, col)
-        except ValueError:
+        link_start = line.rfind("[", 0, col)
+        if link_start == -1:
             return None
-        try:
-            link_end = line.index(")", col)
-        except ValueError:
+        link_end = line.find(")", col)
+        if link_end == -1:
             return None
-        match = LINK_RE.match(line[link_start : link_end + 1])
-        if match:
-            return match[1]
-        else:
+        # Equivalent to LINK_RE.match on line[link_start : link_end + 1], but without
+        # running the regex engine
+        title_end = line.find("](", link_start, link_end)
+        if title_end == -1 or line.find("]", link_start, title_end) != -1:
             return None
+        id_end = line.index(")", title_end + 2, link_end + 1)
+        return line[title_end + 2 : id_end]
 
     def _find_url_link(self, line: str, col: int) -> t.Optional[str]:
-        try:
-            link_start = line.rindex("gkeep://", 0, col + 8)
-        except ValueError:
+        link_start = line.rfind("gkeep://", 0, col + 8)
+        if link_start == -1:
             return None
         url = NoteUrl.from_ephemeral_bufname(line[link_start:])
         return url.id
@@ -997,22 +1181,14 @@ class GkeepPlugin:
 
 
 def _complete_arg_list(arg_lead: str, options: t.Iterable[str]) -> t.List[str]:
-    return [opt for opt in options if opt.lower().startswith(arg_lead.lower())]
+    arg_lead = arg_lead.lower()
+    return [opt for opt in options if opt.lower().startswith(arg_lead)]
 
 
 def _get_arg_index(line: str, cursor_pos: int) -> int:
     """Return which argument the cursor is currently on"""
-    arg_idx = -1
-    i = 0
-    while i < cursor_pos:
-        if line[i] == " ":
-            arg_idx += 1
-            # Multiple spaces are treated as a single delimiter
-            while i < cursor_pos and line[i] == " ":
-                i += 1
-            continue
-        i += 1
-    return arg_idx
+    # Multiple spaces are treated as a single delimiter
+    return len(ARG_DELIMITER_RE.findall(line, 0, cursor_pos)) - 1
 
 
 def _complete_multi_arg_list(
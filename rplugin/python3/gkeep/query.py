@@ -1,6 +1,7 @@
 import logging
 import re
 import typing as t
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 from gkeepapi.node import ColorValue, TopLevelNode
@@ -13,6 +14,10 @@ logger = logging.getLogger(__name__)
 FLAG_RE = re.compile(r"[+\-=]\w+", re.I)
 COLOR_RE = re.compile(r"\b(?:c|colors?):([\w,]+)\b", re.I)
 LABEL_RE = re.compile(r'\b(?:l|labels?):(?:"([^"]+)"|([\w,]+)\b)', re.I)
+# Matches any of the above, for stripping them out of the query in one pass
+STRIP_RE = re.compile(
+    f"(?:{FLAG_RE.pattern})|(?:{COLOR_RE.pattern})|(?:{LABEL_RE.pattern})", re.I
+)
 FLAG_MAP = {
     "p": "pinned",
     "a": "archived",
@@ -22,29 +27,114 @@ FLAG_MAP = {
 FlagTest = t.Callable[[bool], bool]
 
 
+# The tests are stateless, so every Query can share them
+FLAG_TESTS: t.Dict[str, FlagTest] = {
+    "+": lambda _: True,
+    "-": lambda val: not val,
+    "=": lambda val: val,
+}
+
+
 def flag(ftype: str) -> FlagTest:
-    if ftype == "+":
-        return lambda _: True
-    elif ftype == "-":
-        return lambda val: not val
-    elif ftype == "=":
-        return lambda val: val
-    else:
-        raise ValueError(f"Unknown flag {ftype}")
+    try:
+        return FLAG_TESTS[ftype]
+    except KeyError:
+        raise ValueError(f"Unknown flag {ftype}") from None
+
+
+@lru_cache(maxsize=128)
+def _build_search_re(match_str: str) -> t.Pattern[str]:
+    # Collapse whitespace
+    pattern = re.sub(r"\s+", r" ", match_str)
+    # Escape regex patterns
+    pattern = re.escape(pattern)
+    # Convert space (which was turned into '\\ ' by re.escape) into \s+,
+    # which will search for any amount of whitespace
+    pattern = re.sub(r"\\ ", r"\\s+", pattern)
+    return re.compile(pattern, re.I)
+
+
+def _required_value(test: FlagTest) -> t.Optional[bool]:
+    """The value a flag must have to pass the test, or None if any value passes"""
+    if test(True):
+        return None if test(False) else True
+    return False
+
+
+class ParseResult(t.NamedTuple):
+    labels: t.Optional[t.Tuple[str, ...]]
+    colors: t.Optional[t.FrozenSet[ColorValue]]
+    pinned: FlagTest
+    trashed: FlagTest
+    archived: FlagTest
+    match_str: str
+    parse_errors: t.Tuple[str, ...]
+
+
+@lru_cache(maxsize=128)
+def parse_query(query: str) -> ParseResult:
+    """Parse a query string. The results are cached, so they must not be mutated."""
+    flags = {
+        "pinned": flag("+"),
+        "trashed": flag("-"),
+        "archived": flag("-"),
+    }
+    parse_errors: t.List[str] = []
+    for flag_match in FLAG_RE.finditer(query):
+        flag_str = flag_match[0]
+        flag_type = flag_str[0]
+        for key in flag_str[1:]:
+            try:
+                attr = FLAG_MAP[key]
+            except KeyError:
+                parse_errors.append(f"Unknown flag '{key}'")
+            else:
+                flags[attr] = flag(flag_type)
+
+    colors: t.Optional[t.Set[ColorValue]] = None
+    for color_match in COLOR_RE.finditer(query):
+        for col in color_match[1].split(","):
+            if colors is None:
+                colors = set()
+            colors.add(ColorValue(col.upper()))
+
+    labels: t.Optional[t.List[str]] = None
+    for label_match in LABEL_RE.finditer(query):
+        if label_match[1]:
+            names = [label_match[1]]
+        else:
+            names = label_match[2].split(",")
+        if labels is None:
+            labels = []
+        labels.extend(name.lower() for name in names)
+
+    return ParseResult(
+        None if labels is None else tuple(labels),
+        None if colors is None else frozenset(colors),
+        flags["pinned"],
+        flags["trashed"],
+        flags["archived"],
+        STRIP_RE.sub("", query).strip(),
+        tuple(parse_errors),
+    )
 
 
 class Query:
     def __init__(self, query: str = ""):
-        self._parse_errors: t.List[str] = []
         self.query = query
-        self.labels: t.Optional[t.List[str]] = None
-        self.colors: t.Optional[t.Set[ColorValue]] = None
-        self.match_str: str = ""
-        self.pinned: FlagTest = flag("+")
-        self.trashed: FlagTest = flag("-")
-        self.archived: FlagTest = flag("-")
+        result = parse_query(query)
+        self._parse_errors: t.List[str] = list(result.parse_errors)
+        self.labels: t.Optional[t.List[str]] = (
+            None if result.labels is None else list(result.labels)
+        )
+        self.colors: t.Optional[t.Set[ColorValue]] = (
+            None if result.colors is None else set(result.colors)
+        )
+        self.match_str: str = result.match_str
+        self.pinned: FlagTest = result.pinned
+        self.trashed: FlagTest = result.trashed
+        self.archived: FlagTest = result.archived
         self._test: t.Optional[t.Callable[[TopLevelNode], bool]] = None
-        self._parse()
 
     def __eq__(self, other: t.Any) -> bool:
         if other is None:
@@ -63,51 +153,10 @@ class Query:
     def __repr__(self) -> str:
         return f"Query({self.query})"
 
-    def _parse(self) -> None:
-        query = self.query
-        for flag_match in FLAG_RE.finditer(query):
-            flag_str = flag_match[0]
-            flag_type = flag_str[0]
-            for key in flag_str[1:]:
-                try:
-                    attr = FLAG_MAP[key]
-                except KeyError:
-                    self._parse_errors.append(f"Unknown flag '{key}'")
-                else:
-                    setattr(self, attr, flag(flag_type))
-
-        for color_match in COLOR_RE.finditer(query):
-            for col in color_match[1].split(","):
-                self._add_color(col)
-
-        for label_match in LABEL_RE.finditer(query):
-            if label_match[1]:
-                self._add_label(label_match[1])
-            else:
-                for label in label_match[2].split(","):
-                    self._add_label(label)
-
-        query = re.sub(FLAG_RE, "", query)
-        query = re.sub(COLOR_RE, "", query)
-        query = re.sub(LABEL_RE, "", query)
-        self.match_str = query.strip()
-
     @property
     def parse_errors(self) -> t.List[str]:
         return self._parse_errors
 
-    def _add_label(self, label: str) -> None:
-        if self.labels is None:
-            self.labels = []
-        self.labels.append(label.lower())
-
-    def _add_color(self, color: t.Union["ColorValue", str]) -> None:
-        if isinstance(color, str):
-            color = ColorValue(color.upper())
-        if self.colors is None:
-            self.colors = set()
-        self.colors.add(color)
-
     def compile(self, keep: "KeepApi") -> t.Callable[["TopLevelNode"], bool]:
         labels = None
         if self.labels:
@@ -119,16 +168,16 @@ class Query:
                 else:
                     self._parse_errors.append(f"Unknown label '{name}'")
 
-        search_re = None
+        search = None
         if self.match_str:
-            # Collapse whitespace
-            pattern = re.sub(r"\s+", r" ", self.match_str)
-            # Escape regex patterns
-            pattern = re.escape(pattern)
-            # Convert space (which was turned into '\\ ' by re.escape) into \s+,
-            # which will search for any amount of whitespace
-            pattern = re.sub(r"\\ ", r"\\s+", pattern)
-            search_re = re.compile(pattern, re.I)
+            search = _build_search_re(self.match_str).search
+
+        # Resolve everything that doesn't depend on the node up front, so that the
+        # test only does the checks that this query actually uses
+        colors = self.colors
+        pinned = _required_value(self.pinned)
+        trashed = _required_value(self.trashed)
+        archived = _required_value(self.archived)
 
         def test(node: "TopLevelNode") -> bool:
             if labels is not None:
@@ -137,23 +186,26 @@ class Query:
                         break
                 else:
                     return False
-            if self.colors is not None and node.color not in self.colors:
+            if colors is not None and node.color not in colors:
                 return False
-            if not self.pinned(node.pinned):
+            if pinned is not None and node.pinned != pinned:
                 return False
-            if not self.trashed(node.trashed):
+            if trashed is not None and node.trashed != trashed:
                 return False
-            if not self.archived(node.archived):
+            if archived is not None and node.archived != archived:
                 return False
-            if search_re is not None:
-                return bool(search_re.search(node.title) or search_re.search(node.text))
+            if search is not None:
+                return search(node.title) is not None or search(node.text) is not None
             return True
 
         self._test = test
         return test
 
-    def match(self, keep: "KeepApi", node: "TopLevelNode") -> bool:
+    def matcher(self, keep: "KeepApi") -> t.Callable[["TopLevelNode"], bool]:
+        """Get the compiled test, for callers that match many notes"""
         if self._test is None:
-            test = self.compile(keep)
-            return test(node)
-        return self._test(node)
+            return self.compile(keep)
+        return self._test
+
+    def match(self, keep: "KeepApi", node: "TopLevelNode") -> bool:
+        return self.matcher(keep)(node)
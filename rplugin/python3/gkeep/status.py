@@ -1,4 +1,5 @@
 import sys
+import threading
 import time
 import typing as t
 from functools import wraps
@@ -8,11 +9,45 @@ if sys.version_info < (3, 8):
 else:
     from typing import Literal
 
-_status_stack = []
+
+class _StatusStack:
+    def __init__(self) -> None:
+        self.stack: t.List[str] = []
+        # Snapshot of the top of the stack. This is read far more often (every
+        # statusline redraw) than the stack changes, so keep it up to date on push/pop.
+        self.current: t.Optional[str] = None
+        self.lock = threading.Lock()
+
+
+_status = _StatusStack()
+# Called (from whichever thread pushed the status) when the stack goes from empty
+# to non-empty
+_start_callbacks: t.List[t.Callable[[], None]] = []
 
 F = t.TypeVar("F", bound=t.Callable[..., t.Any])
 
 
+def _push(msg: str) -> None:
+    with _status.lock:
+        started = not _status.stack
+        _status.stack.append(msg)
+        _status.current = msg
+    if started:
+        for callback in _start_callbacks:
+            callback()
+
+
+def _remove(msg: str) -> None:
+    with _status.lock:
+        stack = _status.stack
+        # Statuses almost always finish in LIFO order, so avoid the scan if we can
+        if stack and stack[-1] == msg:
+            stack.pop()
+        else:
+            stack.remove(msg)
+        _status.current = stack[-1] if stack else None
+
+
 class Status:
     def __init__(self, msg: str):
         self.msg = msg
@@ -20,29 +55,29 @@ class Status:
 
     def start(self) -> "Status":
         if not self._active:
-            _status_stack.append(self.msg)
+            _push(self.msg)
             self._active = True
         return self
 
     def stop(self) -> None:
         if self._active:
             self._active = False
-            _status_stack.remove(self.msg)
+            _remove(self.msg)
 
     def __enter__(self) -> None:
-        _status_stack.append(self.msg)
+        _push(self.msg)
 
     def __exit__(self, *_: t.Any) -> None:
-        _status_stack.pop()
+        _remove(self.msg)
 
     def __call__(self, f: F) -> F:
         @wraps(f)
         def d(*args: t.Any, **kwargs: t.Any) -> t.Any:
-            _status_stack.append(self.msg)
+            _push(self.msg)
             try:
                 return f(*args, **kwargs)
             finally:
-                _status_stack.pop()
+                _remove(self.msg)
 
         return d  # type: ignore[return-value]
 
@@ -61,18 +96,26 @@ class Spinner:
 
     @property
     def frame(self) -> str:
+        now = time.monotonic()
         if self._start_time is None:
-            self._start_time = time.time()
-        idx = round(self.fps * (time.time() - self._start_time))
-        idx = idx % len(self._frames)
-        return self._frames[idx]
+            self._start_time = now
+        idx = int(self.fps * (now - self._start_time))
+        return self._frames[idx % len(self._frames)]
+
+
+def on_status_start(callback: t.Callable[[], None]) -> None:
+    _start_callbacks.append(callback)
+
+
+def has_active_spinners() -> bool:
+    return _status.current is not None
 
 
 def get_status(
-    include_spinner: t.Union[bool, Literal["right"]] = False
+    include_spinner: t.Union[bool, Literal["right"]] = False,
 ) -> t.Optional[str]:
-    if _status_stack:
-        st = _status_stack[-1]
+    st = _status.current
+    if st is not None:
         if include_spinner == "right":
             st = st + " " + default_spinner.frame
         elif include_spinner:
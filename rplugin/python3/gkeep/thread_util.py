@@ -1,4 +1,5 @@
 import logging
+import queue
 import threading
 import typing as t
 from functools import partial, wraps
@@ -17,8 +18,9 @@ def wrap_lock(lock: threading.Lock, func: F, max_waiting: t.Optional[int] = None
                 func(*args, **kwargs)
 
     else:
-        wait_count: t.Dict[t.Any, int] = {}
-        run_count: t.Dict[t.Any, int] = {}
+        # Map of args to [num_running, num_waiting]. Entries are removed once both
+        # reach zero, so this doesn't grow with every distinct set of args.
+        counts: t.Dict[t.Any, t.List[int]] = {}
         countlock = threading.Lock()
 
         @wraps(func)
@@ -28,35 +30,27 @@ def wrap_lock(lock: threading.Lock, func: F, max_waiting: t.Optional[int] = None
                     "Cannot use keyword arguments for @background function with max_waiting"
                 )
             with countlock:
-                num_running = run_count.setdefault(args, 0)
-                num_waiting = wait_count.setdefault(args, 0)
+                count = counts.get(args)
+                if count is None:
+                    count = counts[args] = [0, 0]
+                num_running, num_waiting = count
                 if max_waiting == 0:
                     if num_running > 0 or num_waiting > 0:
                         return
                 elif num_waiting >= max_waiting:
                     return
-                wait_count[args] += 1
+                count[1] += 1
             with lock:
                 with countlock:
-                    run_count[args] += 1
-                    wait_count[args] -= 1
+                    count[0] += 1
+                    count[1] -= 1
                 try:
                     func(*args, **kwargs)
                 finally:
                     with countlock:
-                        run_count[args] -= 1
-
-    return w  # type: ignore[return-value]
-
-
-def wrap_log_exception(func: F) -> F:
-    @wraps(func)
-    def w(*args, **kwargs):  # type: ignore[no-untyped-def]
-        try:
-            func(*args, **kwargs)
-        except Exception:
-            logger.exception("Exception while running background thread")
-            raise
+                        count[0] -= 1
+                        if count[0] == 0 and count[1] == 0:
+                            del counts[args]
 
     return w  # type: ignore[return-value]
 
@@ -68,14 +62,54 @@ def background(*args: t.Any, **kwargs: t.Any) -> t.Any:
         return partial(background, **kwargs)
     use_lock = kwargs.pop("lock", True)
     max_waiting = kwargs.pop("max_waiting", None)
-    target = wrap_log_exception(func)
+    target = func
     if use_lock:
         lock = threading.Lock()
         target = wrap_lock(lock, target, max_waiting)
 
     @wraps(func)
     def w(*args: t.Any, **kwargs: t.Any) -> None:
-        thread = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
-        thread.start()
+        _pool.submit(target, args, kwargs)
 
     return w
+
+
+_Task = t.Tuple[t.Callable[..., t.Any], t.Tuple, t.Dict]
+
+
+class _WorkerPool:
+    """
+    Background functions are run on a pool of reusable worker threads. The pool grows
+    whenever there is no idle worker, because many of these functions block on a lock
+    (or loop for a while) and a fixed size pool could starve. The workers are daemon
+    threads, like the one-off threads they replace, so they never block nvim exiting.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: "queue.SimpleQueue[_Task]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._idle_workers = 0
+
+    def submit(
+        self, func: t.Callable[..., t.Any], args: t.Tuple, kwargs: t.Dict
+    ) -> None:
+        with self._lock:
+            if self._idle_workers:
+                # Claim an idle worker for this task
+                self._idle_workers -= 1
+            else:
+                threading.Thread(target=self._worker, daemon=True).start()
+        self._tasks.put((func, args, kwargs))
+
+    def _worker(self) -> None:
+        while True:
+            func, args, kwargs = self._tasks.get()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception("Exception while running background thread")
+            with self._lock:
+                self._idle_workers += 1
+
+
+_pool = _WorkerPool()
@@ -2,10 +2,12 @@ import enum
 import logging
 import os
 import re
+import shutil
 import subprocess
 import sys
 import typing as t
 import unicodedata
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 import pynvim
@@ -23,10 +25,20 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+WHITESPACE_RE = re.compile(r"\s")
+FILENAME_UNSAFE_RE = re.compile(r"[^\w\s\.-]")
+# gkeep://{id}/{title}.{ext}. Splits off the extension the same way as
+# os.path.splitext, so leading dots in the filename are not an extension.
+EPHEMERAL_BUFNAME_RE = re.compile(
+    r"gkeep://([^/]*)/((?:.*/)?(?:\.*[^/.][^/]*?(?=\.[^./]*$)|[^/]*))"
+)
+
 NoteType = t.Union[List, Note]
 
 
 class NoteUrl:
+    __slots__ = ("id", "title")
+
     def __init__(
         self,
         id: t.Optional[str],
@@ -42,9 +54,10 @@ class NoteUrl:
     @classmethod
     def from_ephemeral_bufname(cls, bufname: str) -> "NoteUrl":
         assert cls.is_ephemeral(bufname)
-        id, name = bufname.split("/", 3)[2:]
-        name = os.path.splitext(name)[0]
-        return cls(id, name)
+        match = EPHEMERAL_BUFNAME_RE.match(bufname)
+        if match is None:
+            raise ValueError(f"Malformed gkeep bufname '{bufname}'")
+        return cls(match[1], match[2])
 
     @staticmethod
     def is_ephemeral(bufname: str) -> bool:
@@ -59,10 +72,15 @@ class NoteUrl:
             return None
         filename = self._get_filename(api, config, note)
         if note.archived:
-            assert config.archive_sync_dir is not None
-            return os.path.join(config.archive_sync_dir, filename)
+            directory = config.archive_sync_dir
+            assert directory is not None
         else:
-            return os.path.join(config.sync_dir, filename)
+            directory = config.sync_dir
+        # The directories are absolute paths and the filename is escaped, so this is
+        # equivalent to os.path.join, without all of its checks
+        if directory.endswith(os.sep):
+            return directory + filename
+        return f"{directory}{os.sep}{filename}"
 
     def bufname(self, api: "KeepApi", config: Config, note: TopLevelNode) -> str:
         filepath = self.filepath(api, config, note)
@@ -105,6 +123,18 @@ def dispatch(vim: pynvim.Nvim, config: Config, func: str, *args: t.Any) -> None:
         vim.async_call(vim.exec_lua, "require'gkeep'.dispatch(...)", func, *args)
 
 
+AtomicCall = t.Tuple[str, t.Sequence[t.Any]]
+
+
+def call_atomic(vim: pynvim.Nvim, calls: t.Sequence[AtomicCall]) -> t.List[t.Any]:
+    """Make multiple API calls in a single RPC request"""
+    results, error = vim.api.call_atomic(calls)
+    if error is not None:
+        idx, _, msg = error
+        raise pynvim.NvimError(f"{calls[idx][0]} failed: {msg}")
+    return results
+
+
 def echoerr(vim: pynvim.Nvim, message: str) -> None:
     vim.api.echo(
         [(message, "Error")],
@@ -113,13 +143,15 @@ def echoerr(vim: pynvim.Nvim, message: str) -> None:
     )
 
 
+CHECKBOXES: t.Dict[t.Union[bool, str], str] = {
+    True: "[x] ",
+    False: "[ ] ",
+    "partial": "[-] ",
+}
+
+
 def checkbox(checked: t.Union[bool, Literal["partial"]]) -> str:
-    if checked == "partial":
-        return "[-] "
-    elif checked:
-        return "[x] "
-    else:
-        return "[ ] "
+    return CHECKBOXES[checked]
 
 
 class NoteEnum(enum.Enum):
@@ -146,15 +178,30 @@ def get_link(note: TopLevelNode) -> str:
     return f"https://keep.google.com/#NOTE/{note.server_id}"
 
 
+# Same as the regexes used in escape(), for ASCII-only strings
+_ASCII_ESCAPE_TABLE: t.Dict[int, t.Optional[str]] = {}
+for _c in range(128):
+    if WHITESPACE_RE.match(chr(_c)):
+        _ASCII_ESCAPE_TABLE[_c] = " "
+    elif FILENAME_UNSAFE_RE.match(chr(_c)):
+        _ASCII_ESCAPE_TABLE[_c] = None
+del _c
+
+
+# Every filepath lookup escapes the title, often more than once, and the
+# result only depends on the title string
+@lru_cache(maxsize=4096)
 def escape(title: str) -> str:
     normalized = unicodedata.normalize("NFKC", title)
+    if normalized.isascii():
+        return normalized.translate(_ASCII_ESCAPE_TABLE)
     # Replace all whitespace with a space character
-    normalized = re.sub(r"\s", " ", normalized)
-    return re.sub(r"[^\w\s\.-]", "", normalized)
+    normalized = WHITESPACE_RE.sub(" ", normalized)
+    return FILENAME_UNSAFE_RE.sub("", normalized)
 
 
 def normalize_title(title: str) -> str:
-    return re.sub(r"\s", " ", title)
+    return WHITESPACE_RE.sub(" ", title)
 
 
 def get_ext(filename: str) -> str:
@@ -167,26 +214,31 @@ def get_ext(filename: str) -> str:
     return ext.lower()
 
 
-def set_note_opts_and_vars(note: NoteType, bufnr: Buffer) -> None:
+def set_note_opts_and_vars(
+    note: NoteType, bufnr: Buffer, filetype: t.Optional[str] = None
+) -> None:
     nt = get_type(note)
-    bufnr.vars["note_type"] = nt.value
-    if bufnr.options["filetype"] == KEEP_FT:
+    # Nothing needs the result of the writes, so don't wait for the responses
+    bufnr.api.set_var("note_type", nt.value, async_=True)
+    if filetype is None:
+        filetype = bufnr.options["filetype"]
+    if filetype == KEEP_FT:
         shiftwidth = 2 if nt == NoteEnum.NOTE else 4
-        bufnr.options["shiftwidth"] = shiftwidth
+        bufnr.api.set_option("shiftwidth", shiftwidth, async_=True)
+
+
+# The available executables won't change while the plugin is running, so look
+# them up once instead of asking nvim every time
+_BROWSER_CMD = (
+    shutil.which("open") or shutil.which("xdg-open") or os.environ.get("BROWSER")
+)
 
 
 def open_url(vim: pynvim.Nvim, url: str) -> None:
-    cmd = None
-    if vim.funcs.executable("open"):
-        cmd = "open"
-    elif vim.funcs.executable("xdg-open"):
-        cmd = "xdg-open"
-    else:
-        cmd = os.getenv("BROWSER")
-    if cmd is None:
+    if _BROWSER_CMD is None:
         echoerr(
             vim,
             "Could not find web browser. Set the BROWSER environment variable and restart",
         )
     else:
-        subprocess.call([cmd, url])
+        subprocess.call([_BROWSER_CMD, url])
@@ -1,7 +1,6 @@
+import asyncio
 import enum
 import logging
-import threading
-import time
 import typing as t
 from functools import partial
 
@@ -18,6 +17,8 @@ from pynvim.api import Buffer, Nvim, Window
 
 logger = logging.getLogger(__name__)
 
+SELECT_DEBOUNCE_MS = 25
+
 
 class Position(enum.Enum):
     LEFT = "left"
@@ -38,14 +39,29 @@ class Menu(View):
         self._home = MenuItem("home", "Home", "")
         self._labels: t.List[MenuItem] = []
         self._last_search: t.Optional[MenuItem] = None
+        self._last_selected_item: t.Optional[MenuItem] = None
         self._archived = MenuItem("archived", "Archive", "=a")
         self._trashed = MenuItem("trashed", "Trash", "=t")
-        self._status_thread = threading.Thread(
-            target=self._run_update_status, daemon=True
-        )
-        self._status_thread.start()
+        # Built on demand by the items property. Set back to None whenever the
+        # labels or searches change.
+        self._items: t.Optional[t.List[MenuItem]] = None
+        # Maps id(item) to its index in _items
+        self._item_index: t.Dict[int, int] = {}
         self._last_status: t.Optional[str] = None
-        self._ns_id = None
+        # Only runs while there is a status to animate. Only touched from the
+        # event loop thread.
+        self._status_timer: t.Optional[asyncio.TimerHandle] = None
+        gstatus.on_status_start(self._start_status_timer)
+        if gstatus.has_active_spinners():
+            self._start_status_timer()
+        self._hl_ns_id: t.Optional[int] = None
+        self._vt_ns_id: t.Optional[int] = None
+        # Whether the namespaces may have anything in them that needs clearing
+        self._hl_dirty = False
+        self._vt_dirty = False
+        self._display_widths: t.Dict[str, int] = {}
+        self._rendering = False
+        self._pending_render: t.Optional[t.Tuple[t.Optional[int], int]] = None
         self.dispatch = partial(util.dispatch, self._vim, self._config)
 
     def _get_shortcuts(self) -> t.List[t.Tuple[str, str, str, str]]:
@@ -70,50 +86,93 @@ class Menu(View):
             ("n", "?", act("show_help"), "Show help"),
         ]
 
-    def _run_update_status(self) -> None:
-        while self._config.state != State.ShuttingDown:
-            time.sleep(1 / gstatus.default_spinner.fps)
-            status = gstatus.get_status(True)
-            if status != self._last_status:
-                self.dispatch("render_status")
+    def _start_status_timer(self) -> None:
+        # Can be called from any thread
+        self._vim.loop.call_soon_threadsafe(self._schedule_status_tick)
 
-    def _get_item_under_cursor(self) -> t.Union[MenuItem, None]:
-        mywin = self.get_win()
+    def _schedule_status_tick(self) -> None:
+        if self._status_timer is None and self._config.state != State.ShuttingDown:
+            # async_call runs the tick in a greenlet so it can make requests
+            self._status_timer = self._vim.loop.call_later(
+                1 / gstatus.default_spinner.fps, self._vim.async_call, self._tick_status
+            )
+
+    def stop_status_timer(self) -> None:
+        timer = self._status_timer
+        if timer is not None:
+            self._status_timer = None
+            timer.cancel()
+
+    def _tick_status(self) -> None:
+        self._status_timer = None
+        if self._config.state == State.ShuttingDown:
+            return
+        self.render_status()
+        # Keep going until the status has cleared
+        if gstatus.has_active_spinners():
+            self._schedule_status_tick()
+
+    def _get_item_under_cursor(
+        self, mywin: t.Optional[Window] = None
+    ) -> t.Union[MenuItem, None]:
+        if mywin is None:
+            mywin = self.get_win()
         if mywin is None:
             return None
         line = mywin.cursor[0]
         idx = line - 1
-        if idx >= len(list(self.items)):
+        items = self.items
+        if idx >= len(items):
             return None
-        return list(self.items)[idx]
+        return items[idx]
 
     def refresh(self, force: bool = False) -> None:
-        current_item = self._get_item_under_cursor()
-        self._labels.clear()
-        for label in self._api.labels():
-            self._labels.append(MenuItem("label", label.name, f'l:"{label.name}"'))
+        # Rendering doesn't change which window the menu is in, so only look
+        # it up once
+        mywin = self.get_win()
+        current_item = self._get_item_under_cursor(mywin)
+        # gkeepapi updates labels in place during sync, so there is no version
+        # to check. Comparing the names is still cheaper than rebuilding.
+        names = [label.name for label in self._api.labels()]
+        if names != [item.name for item in self._labels]:
+            self._labels = [MenuItem("label", name, f'l:"{name}"') for name in names]
+        # Saved searches may have changed too (e.g. cleared on logout)
+        self._items = None
         self.render()
-        if current_item != self._get_item_under_cursor():
+        if mywin is not None and current_item != self._get_item_under_cursor(mywin):
             self.cmd_select(False)
         if force or not self._notelist.notes:
             self._notelist.rerun_query()
 
     @property
-    def items(self) -> t.Iterator[MenuItem]:
-        yield self._home
-        yield from self._labels
-        yield from self._config.saved_searches
+    def items(self) -> t.List[MenuItem]:
+        if self._items is None:
+            return self._rebuild_items()
+        return self._items
+
+    def _rebuild_items(self) -> t.List[MenuItem]:
+        items = [self._home]
+        items.extend(self._labels)
+        items.extend(self._config.saved_searches)
         if self._last_search is not None:
-            yield self._last_search
-        yield self._archived
-        yield self._trashed
+            items.append(self._last_search)
+        items.append(self._archived)
+        items.append(self._trashed)
+        self._items = items
+        self._item_index = {id(item): i for i, item in enumerate(items)}
+        return items
+
+    def _get_lnum(self, item: MenuItem) -> int:
+        if self._items is None:
+            self._rebuild_items()
+        return self._item_index[id(item)] + 1
 
     def close(self) -> None:
         super().close()
         self._notelist.close()
 
-    def _setup_win(self, window: Window) -> None:
-        window.options["winfixheight"] = True
+    def _setup_win(self, window: Window) -> t.List[util.AtomicCall]:
+        return [("nvim_win_set_option", [window, "winfixheight", True])]
 
     def open(self, enter: bool = True, position: Position = Position.LEFT) -> None:
         winid = self.get_win()
@@ -142,6 +201,9 @@ class Menu(View):
                 lnum = i + 1
                 break
         mywin.api.set_cursor((lnum, 0))
+        # The render above had no selection to draw virtual text for, so force
+        # the select to run even if the item hasn't changed
+        self._last_selected_item = None
         self.cmd_select()
         self._notelist.open()
         mywin.height = 8
@@ -150,11 +212,20 @@ class Menu(View):
         else:
             self._vim.current.window = startwin
 
-    def _setup_buffer(self, buffer: Buffer) -> None:
-        buffer.options["filetype"] = "GoogleKeepMenu"
-        self._vim.command(
-            f"au CursorMoved <buffer={buffer.number}> call _gkeep_menu_action('select')"
-        )
+    def _setup_buffer(self, buffer: Buffer) -> t.List[util.AtomicCall]:
+        # New buffer, so there is nothing to clear
+        self._hl_dirty = self._vt_dirty = False
+        return [
+            ("nvim_buf_set_option", [buffer, "filetype", "GoogleKeepMenu"]),
+            # Debounced so that holding j/k only runs the query for where we stop
+            (
+                "nvim_command",
+                [
+                    f"au CursorMoved <buffer={buffer.number}> "
+                    f"lua require'gkeep'.schedule_menu_select({SELECT_DEBOUNCE_MS})"
+                ],
+            ),
+        ]
 
     def toggle(self, enter: bool = True, position: Position = Position.LEFT) -> None:
         if self.is_visible:
@@ -163,66 +234,156 @@ class Menu(View):
             self.open(enter, position)
 
     def render(self, jump_to_lnum: t.Optional[int] = None, num_lines: int = -1) -> None:
+        if self._rendering:
+            # Another handler ran while render() was waiting on nvim. Fold this
+            # request into a single follow-up render instead of interleaving.
+            pending = self._pending_render
+            if pending is not None:
+                if jump_to_lnum is None:
+                    jump_to_lnum = pending[0]
+                if num_lines != -1 and pending[1] != -1:
+                    num_lines = max(num_lines, pending[1])
+                else:
+                    num_lines = -1
+            self._pending_render = (jump_to_lnum, num_lines)
+            return
+        self._rendering = True
+        try:
+            self._render(jump_to_lnum, num_lines)
+            while self._pending_render is not None:
+                args = self._pending_render
+                self._pending_render = None
+                self._render(*args)
+        finally:
+            self._rendering = False
+            self._pending_render = None
+
+    def _render(self, jump_to_lnum: t.Optional[int], num_lines: int) -> None:
         bufnr = self.bufnr
         if bufnr is None:
             return
 
-        lines = [item.title(self._config) for item in self.items]
-        if num_lines > 0:
-            lines = lines[:num_lines]
+        items = self.items if num_lines < 0 else self.items[:num_lines]
+        lines = [item.title(self._config) for item in items]
         status = self._last_status = gstatus.get_status("right")
         if status is None and not self._api.is_logged_in:
             status = "Log in with :GkeepLogin"
 
-        highlights = []
+        status_col = None
         if status and lines:
-            statuslen = self._vim.funcs.strdisplaywidth(status)
-            linelen = self._vim.funcs.strdisplaywidth(lines[0])
-            start = self._vim.funcs.strlen(lines[0])
-            lines[0] = (
-                lines[0] + " " * (self._config.width - (statuslen + linelen)) + status
+            statuslen, linelen = self._get_display_widths(status, lines[0])
+            # strlen() is the length in bytes
+            status_col = len(lines[0].encode("utf-8"))
+            # Pad by display width. str.ljust() counts characters, which would
+            # be wrong for wide icons.
+            padding = " " * (self._config.width - (statuslen + linelen))
+            lines[0] = f"{lines[0]}{padding}{status}"
+
+        ns = self._get_hl_ns_id()
+        # Send the whole update as a single request
+        calls: t.List[util.AtomicCall] = [
+            ("nvim_buf_set_option", [bufnr, "modifiable", True]),
+            ("nvim_buf_set_lines", [bufnr, 0, num_lines, True, lines]),
+            ("nvim_buf_set_option", [bufnr, "modifiable", False]),
+        ]
+        if self._hl_dirty:
+            calls.append(("nvim_buf_clear_namespace", [bufnr, ns, 0, -1]))
+            self._hl_dirty = False
+        if status_col is not None:
+            self._hl_dirty = True
+            calls.append(
+                (
+                    "nvim_buf_add_highlight",
+                    [bufnr, ns, "GkeepStatus", 0, status_col, -1],
+                )
             )
-            highlights.append(("GkeepStatus", 0, start, -1))
-
-        bufnr.options["modifiable"] = True
-        if num_lines == -1:
-            bufnr[:] = lines
-        else:
-            bufnr[0:num_lines] = lines
-        bufnr.options["modifiable"] = False
-
-        ns = self._vim.api.create_namespace("GkeepMenuHL")
-        bufnr.api.clear_namespace(ns, 0, -1)
-        bufnr.update_highlights(ns, highlights, clear=True)
         if jump_to_lnum is not None:
-            for winid in self._vim.funcs.win_findbuf(bufnr):
-                self._vim.api.win_set_cursor(winid, (jump_to_lnum, 0))
+            calls.append(
+                (
+                    "nvim_exec_lua",
+                    [
+                        "local bufnr, lnum = ...\n"
+                        "for _, winid in ipairs(vim.fn.win_findbuf(bufnr)) do\n"
+                        "  vim.api.nvim_win_set_cursor(winid, { lnum, 0 })\n"
+                        "end",
+                        [bufnr.number, jump_to_lnum],
+                    ],
+                )
+            )
+        util.call_atomic(self._vim, calls)
         self._show_search_virtual_text()
 
+    def _get_display_widths(self, *texts: str) -> t.List[int]:
+        # Non-ascii widths depend on vim options like 'ambiwidth', so ask vim
+        # for those. The status spinner only cycles through a handful of
+        # strings, so they are cached.
+        cache = self._display_widths
+        missing = [
+            text for text in set(texts) if not text.isascii() and text not in cache
+        ]
+        if missing:
+            if len(cache) > 500:
+                cache.clear()
+            widths = util.call_atomic(
+                self._vim,
+                [
+                    ("nvim_call_function", ["strdisplaywidth", [text]])
+                    for text in missing
+                ],
+            )
+            cache.update(zip(missing, widths))
+        return [len(text) if text.isascii() else cache[text] for text in texts]
+
+    def _get_hl_ns_id(self) -> int:
+        if self._hl_ns_id is None:
+            self._hl_ns_id = self._vim.api.create_namespace("GkeepMenuHL")
+        return self._hl_ns_id
+
+    def _get_vt_ns_id(self) -> int:
+        if self._vt_ns_id is None:
+            self._vt_ns_id = self._vim.api.create_namespace("GkeepMenuVT")
+        return self._vt_ns_id
+
     def render_status(self) -> None:
-        self.render(num_lines=1)
+        # _last_status is what render() last drew, so compare the same variant
+        if gstatus.get_status("right") != self._last_status:
+            self.render(num_lines=1)
 
     def _show_search_virtual_text(self) -> None:
         bufnr = self.bufnr
         if bufnr is None:
             return
-        ns = self._vim.api.create_namespace("GkeepMenuVT")
-        bufnr.api.clear_namespace(ns, 0, -1)
+        ns = self._get_vt_ns_id()
+        calls: t.List[util.AtomicCall] = []
+        if self._vt_dirty:
+            calls.append(("nvim_buf_clear_namespace", [bufnr, ns, 0, -1]))
+            self._vt_dirty = False
         item = self._get_item_under_cursor()
-        if item is None or item.icon != "search":
-            return
-        idx = list(self.items).index(item)
-        vtext: t.List[t.Tuple[str, str]] = [(item.query, "Comment")]
-        if self._notelist.query.parse_errors:
-            text = ", ".join(self._notelist.query.parse_errors) + " "
-            vtext.insert(0, (text, "Error"))
-        bufnr.api.set_virtual_text(ns, idx, vtext, {})
+        if item is not None and item.icon == "search":
+            idx = self._get_lnum(item) - 1
+            vtext: t.List[t.Tuple[str, str]] = [(item.query, "Comment")]
+            if self._notelist.query.parse_errors:
+                text = ", ".join(self._notelist.query.parse_errors) + " "
+                vtext.insert(0, (text, "Error"))
+            calls.append(("nvim_buf_set_virtual_text", [bufnr, ns, idx, vtext, {}]))
+            self._vt_dirty = True
+        if calls:
+            util.call_atomic(self._vim, calls)
 
     def cmd_select(self, enter: t.Union[int, bool] = False) -> None:
         startwin = self._vim.current.window
         item = self._get_item_under_cursor()
         if item is None:
             return
+        # CursorMoved also fires for movement within the line. If the same item
+        # is still selected there is nothing to update.
+        if (
+            not enter
+            and item is self._last_selected_item
+            and self._notelist.query == item.query
+        ):
+            return
+        self._last_selected_item = item
         self._notelist.set_query(item.query)
 
         winid = self._notelist.get_win()
@@ -246,8 +407,9 @@ class Menu(View):
             self._last_search.query = query
         else:
             self._last_search = MenuItem("search", "Last Search", query)
+            self._items = None
 
-        lnum = list(self.items).index(self._last_search) + 1
+        lnum = self._get_lnum(self._last_search)
         self.render(lnum)
         self._notelist.set_query(query)
 
@@ -271,12 +433,13 @@ class Menu(View):
             new_item = MenuItem("search", name, item.query)
             self._config.add_saved_search(new_item)
             self._last_search = None
+            self._items = None
         else:
             item.name = name
             self._config.save_cache()
             new_item = item
 
-        lnum = list(self.items).index(new_item) + 1
+        lnum = self._get_lnum(new_item)
         self.render(lnum)
 
     def cmd_rename(self) -> None:
@@ -329,6 +492,7 @@ class Menu(View):
             return
         elif item.icon == "search":
             self._config.remove_saved_search(item)
+            self._items = None
         elif item.icon == "label":
             if force is None:
                 return self._modal.confirm.show(
@@ -341,6 +505,7 @@ class Menu(View):
                 if label is not None:
                     self._api.deleteLabel(label.id)
                     self._labels.remove(item)
+                    self._items = None
                     self.dispatch("sync")
         else:
             return
@@ -358,7 +523,8 @@ class Menu(View):
         label = self._api.createLabel(name)
         new_item = MenuItem("label", label.name, f'l:"{label.name}"')
         self._labels.append(new_item)
-        lnum = list(self.items).index(new_item) + 1
+        self._items = None
+        lnum = self._get_lnum(new_item)
         self.render(lnum)
         self.dispatch("sync")
 
@@ -384,7 +550,7 @@ class Menu(View):
         )
 
     def _do_edit_search(self, item: MenuItem, query: str) -> None:
-        lnum = list(self.items).index(item) + 1
+        lnum = self._get_lnum(item)
         item.query = query
         self.render(lnum)
         self._notelist.set_query(query)
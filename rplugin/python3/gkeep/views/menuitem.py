@@ -8,11 +8,25 @@ if TYPE_CHECKING:
 class MenuItem:
     def __init__(self, icon: str, name: str, query: str):
         self.icon = icon
-        self.name = name
+        self._name = name
         self.query = query
+        self._title: t.Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, name: str) -> None:
+        self._name = name
+        self._title = None
 
     def title(self, config: "Config") -> str:
-        return config.get_icon(self.icon) + self.name
+        # The icons are fixed once the config is loaded, so only a rename can
+        # change the title
+        if self._title is None:
+            self._title = config.get_icon(self.icon) + self._name
+        return self._title
 
     def __hash__(self) -> int:
         return hash(self.query)
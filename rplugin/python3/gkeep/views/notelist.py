@@ -13,11 +13,15 @@ from gkeep.util import NoteEnum, NoteFormat, NoteType, NoteUrl
 from gkeep.views.noteview import NoteView
 from gkeep.views.view import View
 from gkeep.views.view_util import (
+    NoteIcons,
     NoteTypeEditor,
+    build_note_line,
+    build_note_list,
     get_local_changed_file,
-    render_note_line,
-    render_note_list,
+    pad_note_lines,
+    replace_lines_calls,
     split_type_and_format,
+    update_lines_calls,
 )
 from gkeepapi.node import ColorValue, Note
 from pynvim.api import Buffer, Nvim, Window
@@ -25,6 +29,17 @@ from typing_extensions import assert_never
 
 logger = logging.getLogger(__name__)
 
+PREVIEW_DEBOUNCE_MS = 16
+
+
+class WindowInfo(t.NamedTuple):
+    window: Window
+    bufnr: int
+    bufname: str
+    changedtick: int
+    is_preview: bool
+    is_normal: bool
+
 
 class NoteList(View):
     def __init__(
@@ -39,7 +54,16 @@ class NoteList(View):
         self._noteview = noteview
         self._query = Query()
         self._preferred_item: t.Optional[NoteType] = None
-        self._preview_item = None
+        self._hl_ns_id: t.Optional[int] = None
+        self._line_ns_id: t.Optional[int] = None
+        # The (buffer, lines, highlights) that render() last wrote
+        self._last_rendered: t.Optional[
+            t.Tuple[int, t.List[str], t.List[t.Tuple[str, int, int, int]]]
+        ] = None
+        # Maps buffer number to ((name, changedtick), url)
+        self._url_cache: t.Dict[
+            int, t.Tuple[t.Tuple[str, int], t.Optional[NoteUrl]]
+        ] = {}
         self._note_type_editor = NoteTypeEditor(vim, config, api, modal)
         self.dispatch = partial(util.dispatch, self._vim, self._config)
 
@@ -97,20 +121,23 @@ class NoteList(View):
         self.render()
 
     def _select_note(self, note: NoteType) -> None:
-        try:
-            idx = self.notes.index(note)
-        except ValueError:
-            pass
-        else:
+        idx = self._api.get_search_index(self._query).get(note.id)
+        if idx is not None:
             window = self.get_win()
             if window is not None:
                 window.cursor = (idx + 1, 0)
 
-    def _setup_buffer(self, buffer: Buffer) -> None:
-        buffer.options["filetype"] = "GoogleKeepList"
-        self._vim.command(
-            f"au CursorMoved <buffer={buffer.number}> ++nested call _gkeep_list_action('cursor_moved')"
-        )
+    def _setup_buffer(self, buffer: Buffer) -> t.List[util.AtomicCall]:
+        self._last_rendered = None
+        return [
+            ("nvim_buf_set_option", [buffer, "filetype", "GoogleKeepList"]),
+            (
+                "nvim_command",
+                [
+                    f"au CursorMoved <buffer={buffer.number}> ++nested call _gkeep_list_action('cursor_moved')"
+                ],
+            ),
+        ]
 
     def open(self) -> None:
         winid = self.get_win()
@@ -126,47 +153,135 @@ class NoteList(View):
         if bufnr is None:
             return
 
-        render_note_list(self._vim, self._config, self._api, bufnr, self.notes)
-        if not self.notes:
+        notes = self.notes
+        highlights: t.List[t.Tuple[str, int, int, int]] = []
+        if notes:
+            lines, highlights = build_note_list(
+                self._vim, self._config, self._api, notes
+            )
+        else:
             lines = [""]
             if self._api.is_searching(self.query):
                 lines.append("Searching...".center(self._config.width))
             else:
                 lines.append("<No results>".center(self._config.width))
-            bufnr.options["modifiable"] = True
-            bufnr[:] = lines
-            bufnr.options["modifiable"] = False
+        # Renders are triggered by many things that usually change little or
+        # nothing in the list, so only rewrite the rows that differ
+        rendered = (bufnr.number, lines, highlights)
+        if rendered != self._last_rendered:
+            ns = self._get_hl_ns_id()
+            last = self._last_rendered
+            if last is not None and last[0] == bufnr.number:
+                calls = update_lines_calls(
+                    bufnr, last[1], last[2], lines, highlights, ns
+                )
+            else:
+                calls = replace_lines_calls(bufnr, lines, ns, highlights)
+            if calls:
+                util.call_atomic(self._vim, calls)
+            self._last_rendered = rendered
 
         if self._preferred_item is not None:
             self._select_note(self._preferred_item)
         self._update_highlight()
 
+    def _get_hl_ns_id(self) -> int:
+        if self._hl_ns_id is None:
+            self._hl_ns_id = self._vim.api.create_namespace("GkeepNoteListHL")
+        return self._hl_ns_id
+
+    def _get_line_ns_id(self) -> int:
+        if self._line_ns_id is None:
+            self._line_ns_id = self._vim.api.create_namespace("GkeepLineHL")
+        return self._line_ns_id
+
     def rerender_note(self, note_or_id: t.Union[NoteType, str, None]) -> None:
         if note_or_id is None:
             return
-        bufnr = self.bufnr
-        if bufnr is None:
-            return
         if isinstance(note_or_id, str):
             note = self._api.get(note_or_id)
         else:
             note = note_or_id
-        if note not in self.notes:
-            if self.query.match(self._api, note) and self._api.add_search_result(
-                self.query, note
-            ):
-                self.render()
+        self.rerender_notes([note])
+
+    def rerender_notes(self, notes: t.Iterable[NoteType]) -> None:
+        """Rewrite the rows of multiple notes in a single request"""
+        bufnr = self.bufnr
+        if bufnr is None:
             return
-        row = self.notes.index(note)
-        highlights: t.List[t.Tuple[str, int, int, int]] = []
-        line = render_note_line(
-            self._vim, self._config, self._api, row, note, highlights
+        index = self._api.get_search_index(self._query)
+        last = self._last_rendered
+        if last is not None and last[0] != bufnr.number:
+            last = None
+        needs_render = False
+        row_texts = {}
+        icons = NoteIcons.from_config(self._config)
+        for note in notes:
+            row = index.get(note.id)
+            if row is None:
+                if self.query.match(self._api, note) and self._api.add_search_result(
+                    self.query, note
+                ):
+                    needs_render = True
+                continue
+            highlights: t.List[t.Tuple[str, int, int, int]] = []
+            text = build_note_line(
+                self._config, self._api, row, note, highlights, icons
+            )
+            row_texts[row] = (text, highlights)
+        if needs_render:
+            self.render()
+            return
+        padded = pad_note_lines(
+            self._vim, self._config, [text for text, _ in row_texts.values()]
         )
-        bufnr.options["modifiable"] = True
-        bufnr[row : row + 1] = [line]
-        bufnr.options["modifiable"] = False
-        ns = self._vim.api.create_namespace("GkeepNoteListHL")
-        bufnr.update_highlights(ns, highlights, clear_start=row, clear_end=row + 1)
+        rows = {
+            row: (line, highlights)
+            for (row, (_, highlights)), line in zip(row_texts.items(), padded)
+        }
+
+        if last is not None:
+            _, lines, all_highlights = last
+            for row, (line, highlights) in list(rows.items()):
+                if (
+                    row < len(lines)
+                    and lines[row] == line
+                    and [hl for hl in all_highlights if hl[1] == row] == highlights
+                ):
+                    del rows[row]
+            if not rows:
+                return
+            if all(row < len(lines) for row in rows):
+                for row, (line, _) in rows.items():
+                    lines[row] = line
+                all_highlights = sorted(
+                    [hl for hl in all_highlights if hl[1] not in rows]
+                    + [hl for _, row_hl in rows.values() for hl in row_hl],
+                    key=lambda hl: hl[1],
+                )
+                self._last_rendered = (bufnr.number, lines, all_highlights)
+            else:
+                self._last_rendered = None
+        if not rows:
+            return
+
+        ns = self._get_hl_ns_id()
+        calls: t.List[util.AtomicCall] = [
+            ("nvim_buf_set_option", [bufnr, "modifiable", True]),
+        ]
+        for row, (line, _) in rows.items():
+            calls.append(("nvim_buf_set_lines", [bufnr, row, row + 1, True, [line]]))
+        calls.append(("nvim_buf_set_option", [bufnr, "modifiable", False]))
+        for row, (_, highlights) in rows.items():
+            calls.append(("nvim_buf_clear_namespace", [bufnr, ns, row, row + 1]))
+            for hl_group, hl_row, col_start, col_end in highlights:
+                calls.append(
+                    (
+                        "nvim_buf_add_highlight",
+                        [bufnr, ns, hl_group, hl_row, col_start, col_end],
+                    )
+                )
+        util.call_atomic(self._vim, calls)
 
     def _get_selected_notes(self) -> t.Sequence[NoteType]:
         lstart = self._vim.funcs.line("v")
@@ -181,9 +296,10 @@ class NoteList(View):
             return None
         line = mywin.cursor[0]
         idx = line - 1
-        if idx >= len(self.notes):
+        notes = self.notes
+        if idx >= len(notes):
             return None
-        return self.notes[idx]
+        return notes[idx]
 
     def cmd_select(self, enter: bool = False, action: str = "edit") -> None:
         note = self.get_note_under_cursor()
@@ -217,10 +333,16 @@ class NoteList(View):
 
     def _edit_note(self, note: NoteType, action: str) -> None:
         url = NoteUrl.from_note(note)
-        self._vim.command("pclose")
+        bufname = url.bufname(self._api, self._config, note)
         winid = self.get_normal_win()
-        self._vim.current.window = winid
-        self._vim.command(f"{action} {url.bufname(self._api, self._config, note)}")
+        util.call_atomic(
+            self._vim,
+            [
+                ("nvim_command", ["pclose"]),
+                ("nvim_set_current_win", [winid]),
+                ("nvim_command", [f"{action} {bufname}"]),
+            ],
+        )
 
     def cmd_pin(self) -> None:
         for note in self._get_selected_notes():
@@ -231,18 +353,20 @@ class NoteList(View):
         self.dispatch("sync")
 
     def cmd_archive(self) -> None:
-        for note in self._get_selected_notes():
+        notes = self._get_selected_notes()
+        for note in notes:
             note.archived = not note.archived
-            self.rerender_note(note)
+        self.rerender_notes(notes)
         self.dispatch("sync")
 
     def cmd_delete(self) -> None:
-        for note in self._get_selected_notes():
+        notes = self._get_selected_notes()
+        for note in notes:
             if note.trashed:
                 note.untrash()
             else:
                 note.trash()
-            self.rerender_note(note)
+        self.rerender_notes(notes)
         self.dispatch("sync")
 
     def new_note(
@@ -297,10 +421,13 @@ class NoteList(View):
         filepath = url.filepath(self._api, self._config, note)
         if filepath is not None:
             logger.info("Writing %s", filepath)
+            # This has to finish before the file is opened below, so it can't be
+            # handed off to an async write. Build the content up front so it's a
+            # single write.
+            lines = parser.serialize(self._config, note, filetype)
+            content = "".join(line + "\n" for line in lines)
             with open(filepath, "w") as ofile:
-                for line in parser.serialize(self._config, note, filetype):
-                    ofile.write(line)
-                    ofile.write("\n")
+                ofile.write(content)
         self._open_note(note, True)
         self._noteview.render(self._vim.current.buffer, url)
 
@@ -309,22 +436,25 @@ class NoteList(View):
         note = self.get_note_under_cursor()
         if note is None:
             return
-        idx = self.notes.index(note)
+        # This is the cached list of search results, so modifying it below
+        # reorders the results in place
+        notes = self.notes
+        idx = self._api.get_search_index(self._query)[note.id]
         newidx = idx + steps
-        if newidx < 0 or newidx >= len(self.notes):
+        if newidx < 0 or newidx >= len(notes):
             return
         delta = 1000000
         max_sort = 9999999999
         if newidx == 0:
-            low = int(self.notes[newidx].sort)
+            low = int(notes[newidx].sort)
             hi = max(max_sort, low + delta)
-        elif newidx == len(self.notes) - 1:
-            hi = int(self.notes[newidx - 1].sort)
+        elif newidx == len(notes) - 1:
+            hi = int(notes[newidx - 1].sort)
             low = min(0, hi - delta)
         else:
             offset = 0 if steps < 0 else 1
-            n_hi = self.notes[newidx - 1 + offset]
-            n_low = self.notes[newidx + offset]
+            n_hi = notes[newidx - 1 + offset]
+            n_low = notes[newidx + offset]
             hi = int(n_hi.sort)
             low = int(n_low.sort)
             if note.pinned and not n_hi.pinned:
@@ -337,8 +467,9 @@ class NoteList(View):
                 else:
                     hi = max(max_sort, low + delta)
         note.sort = random.randint(low, hi)
-        self.notes.pop(idx)
-        self.notes.insert(newidx, note)
+        notes.pop(idx)
+        notes.insert(newidx, note)
+        self._api.clear_search_index()
         self.render()
         self._vim.current.window.cursor = (newidx + 1, 0)
 
@@ -348,8 +479,9 @@ class NoteList(View):
             self._note_type_editor.change_type(note, self._on_change_type)
 
     def _on_change_type(self, old_note: NoteType, new_note: NoteType) -> None:
-        idx = self.notes.index(old_note)
+        idx = self._api.get_search_index(self._query)[old_note.id]
         self.notes[idx] = new_note
+        self._api.clear_search_index()
         self.rerender_note(new_note)
         self._noteview.rerender_note(new_note.id)
 
@@ -363,68 +495,96 @@ class NoteList(View):
     def _change_color(self, notes: t.Sequence[NoteType], color: ColorValue) -> None:
         for note in notes:
             note.color = color
-            self.rerender_note(note)
-            self.dispatch("sync")
+        self.rerender_notes(notes)
+        self.dispatch("sync")
 
-    def update_highlight_and_preview(self, bufnr: Buffer) -> None:
+    def update_highlight_and_preview(
+        self, bufnr: Buffer, bufname: t.Optional[str] = None
+    ) -> None:
         self._update_highlight()
         mywin = self.get_win()
         if mywin is not None:
             mywin.width = self._config.width
 
-        url = parser.url_from_file(self._config, bufnr.name, bufnr)
+        if bufname is None:
+            bufname = bufnr.name
+        url = parser.url_from_file(self._config, bufname, bufnr)
         if url is None:
             return
-        if self._vim.current.window.options["previewwindow"]:
-            # If this buffer is *only* open in the preview window, set bufhidden=wipe
-            if len(self._vim.funcs.win_findbuf(bufnr)) == 1:
-                bufnr.vars["prev_hidden"] = bufnr.options["bufhidden"]
-                bufnr.options["bufhidden"] = "wipe"
-        else:
-            prev_hidden = bufnr.vars.get("prev_hidden")
-            if prev_hidden is not None:
-                bufnr.options["bufhidden"] = prev_hidden
-                del bufnr.vars["prev_hidden"]
+        self._vim.exec_lua("require'gkeep'.update_preview_bufhidden(...)", bufnr.number)
 
     def _update_highlight(self) -> None:
         mywin = self.get_win()
         mybuf = self.bufnr
         if mywin is None or mybuf is None:
             return
-        notes = {note.id: i for i, note in enumerate(self.notes)}
-        ns = self._vim.api.create_namespace("GkeepLineHL")
-        mybuf.api.clear_namespace(ns, 0, -1)
-        for window in self._vim.current.tabpage.windows:
-            bufnr = window.buffer
-            url = parser.url_from_file(self._config, bufnr.name, bufnr)
+        notes = self._api.get_search_index(self._query)
+        ns = self._get_line_ns_id()
+        calls: t.List[util.AtomicCall] = [
+            ("nvim_buf_clear_namespace", [mybuf, ns, 0, -1])
+        ]
+        for info in self._get_tabpage_windows():
+            url = self._get_window_url(info)
             if url is not None and url.id in notes:
                 row = notes[url.id]
-                mybuf.add_highlight("QuickFixLine", row, 0, -1, ns)
+                calls.append(
+                    ("nvim_buf_add_highlight", [mybuf, ns, "QuickFixLine", row, 0, -1])
+                )
+        util.call_atomic(self._vim, calls)
+
+    def _get_tabpage_windows(self) -> t.List[WindowInfo]:
+        """Get the windows in the current tabpage and what they contain"""
+        # Both calls run in the same request, so the results line up
+        windows, infos = util.call_atomic(
+            self._vim,
+            [
+                ("nvim_tabpage_list_wins", [0]),
+                ("nvim_exec_lua", ["return require'gkeep'.get_tabpage_win_info()", []]),
+            ],
+        )
+        return [WindowInfo(window, *info) for window, info in zip(windows, infos)]
+
+    def _get_window_url(self, info: WindowInfo) -> t.Optional[NoteUrl]:
+        if not parser.is_note_bufname(self._config, info.bufname):
+            return None
+        # Files in the sync dir have to be read to find the note id, so only do
+        # that again when the buffer has changed
+        key = (info.bufname, info.changedtick)
+        cached = self._url_cache.get(info.bufnr)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        file = None if NoteUrl.is_ephemeral(info.bufname) else info.window.buffer
+        url = parser.url_from_file(self._config, info.bufname, file)
+        if len(self._url_cache) > 100:
+            self._url_cache.clear()
+        self._url_cache[info.bufnr] = (key, url)
+        return url
 
     def get_normal_win(self) -> Window:
-        for window in self._vim.current.tabpage.windows:
-            if self.is_normal_win(window):
-                return window
+        for info in self._get_tabpage_windows():
+            if info.is_normal:
+                return info.window
         self._vim.command("noau botright vsplit")
         return self._vim.current.window
 
     def cmd_cursor_moved(self) -> None:
         self._preferred_item = None
-        if self._is_preview_open():
-            self._preview_item = self.get_note_under_cursor()
-            self._vim.exec_lua(
-                "vim.defer_fn(function() vim.fn._gkeep_list_action('update_preview') end, 10)"
-            )
+        # Debounced so that holding j/k only previews the note where we stop.
+        # update_preview checks if the preview window is open.
+        self._vim.exec_lua(
+            "require'gkeep'.schedule_list_preview(...)",
+            PREVIEW_DEBOUNCE_MS,
+            async_=True,
+        )
 
     def cmd_update_preview(self) -> None:
-        win = self._get_preview_win()
-        if win is None:
+        info = self._get_preview_win()
+        if info is None:
             return
         note = self.get_note_under_cursor()
-        if note is None or note != self._preview_item:
+        if note is None:
             return
-        buffer = win.buffer
-        url = parser.url_from_file(self._config, buffer.name, buffer)
+        url = self._get_window_url(info)
         if url is None or url.id == note.id:
             return
         self._preview_note(note)
@@ -432,10 +592,10 @@ class NoteList(View):
     def _is_preview_open(self) -> bool:
         return self._get_preview_win() is not None
 
-    def _get_preview_win(self) -> t.Optional[Window]:
-        for window in self._vim.current.tabpage.windows:
-            if window.options["previewwindow"]:
-                return window
+    def _get_preview_win(self) -> t.Optional[WindowInfo]:
+        for info in self._get_tabpage_windows():
+            if info.is_preview:
+                return info
         return None
 
     def cmd_preview(self) -> None:
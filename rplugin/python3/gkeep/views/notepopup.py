@@ -36,6 +36,7 @@ class NotePopup(View):
         self._note_type_editor = NoteTypeEditor(vim, config, api, modal)
         self.dispatch = partial(util.dispatch, self._vim, self._config)
         self.note: t.Optional[NoteType] = None
+        self._hl_ns_id: t.Optional[int] = None
 
     def _get_shortcuts(self) -> t.List[t.Tuple[str, str, str, str]]:
         def act(e: str, a: str = "") -> str:
@@ -53,12 +54,17 @@ class NotePopup(View):
             ("n", "?", act("show_help"), "Show help"),
         ]
 
-    def _setup_buffer(self, buffer: Buffer) -> None:
-        buffer.options["filetype"] = "GoogleKeepPopup"
-        self._vim.command("aug GkeepPopup")
-        self._vim.command("au!")
-        self._vim.command("aug END")
-        self._vim.command("au BufEnter * call _gkeep_popup_action('on_enter_buf')")
+    def _setup_buffer(self, buffer: Buffer) -> t.List[util.AtomicCall]:
+        return [
+            ("nvim_buf_set_option", [buffer, "filetype", "GoogleKeepPopup"]),
+            ("nvim_command", ["aug GkeepPopup"]),
+            ("nvim_command", ["au!"]),
+            ("nvim_command", ["aug END"]),
+            (
+                "nvim_command",
+                ["au BufEnter * call _gkeep_popup_action('on_enter_buf')"],
+            ),
+        ]
 
     def toggle(self) -> None:
         winid = self.get_win()
@@ -90,7 +96,19 @@ class NotePopup(View):
         bufnr = self.bufnr
         if bufnr is None or self.note is None:
             return
-        render_note_list(self._vim, self._config, self._api, bufnr, [self.note])
+        render_note_list(
+            self._vim,
+            self._config,
+            self._api,
+            bufnr,
+            [self.note],
+            self._get_hl_ns_id(),
+        )
+
+    def _get_hl_ns_id(self) -> int:
+        if self._hl_ns_id is None:
+            self._hl_ns_id = self._vim.api.create_namespace("GkeepNoteListHL")
+        return self._hl_ns_id
 
     def cmd_on_enter_buf(self) -> None:
         # If current window is not float, close the popup
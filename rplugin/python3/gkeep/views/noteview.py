@@ -1,4 +1,5 @@
 import logging
+import typing as t
 
 import gkeep.api
 import gkeep.config
@@ -16,27 +17,55 @@ class NoteView:
         self._config = config
         self._api = api
 
-    def render(self, bufnr: Buffer, url: NoteUrl) -> None:
+    def render(
+        self, bufnr: Buffer, url: NoteUrl, bufname: t.Optional[str] = None
+    ) -> None:
         note = self._api.get(url.id)
         if note is None:
             bufnr[:] = []
             return
         url.title = note.title
-        ext = util.get_ext(bufnr.name)
-        if NoteUrl.is_ephemeral(bufnr.name):
-            bufnr.options["buftype"] = "acwrite"
-        ft = self._config.ft_from_ext(ext)
-        if ft != bufnr.options["filetype"]:
-            bufnr.options["filetype"] = ft
+        if bufname is None:
+            bufname = bufnr.name
+        ft = self._config.ft_from_ext(util.get_ext(bufname))
+        # Send all of the updates as a single request
+        calls: t.List[util.AtomicCall] = []
+        if NoteUrl.is_ephemeral(bufname):
+            calls.append(("nvim_buf_set_option", [bufnr, "buftype", "acwrite"]))
+        # Setting the filetype re-runs the FileType autocmds, so only do it if it
+        # changed. Check in lua so we don't have to wait for the current value.
+        calls.append(
+            (
+                "nvim_exec_lua",
+                [
+                    "local bufnr, ft = ...\n"
+                    "if vim.bo[bufnr].filetype ~= ft then\n"
+                    "  vim.bo[bufnr].filetype = ft\n"
+                    "end",
+                    [bufnr.number, ft],
+                ],
+            )
+        )
         if ft == KEEP_FT:
-            bufnr.options["syntax"] = "keep"
+            calls.append(("nvim_buf_set_option", [bufnr, "syntax", "keep"]))
 
         # Have to use lua here for nvim_win_call with function callback
-        self._vim.exec_lua("require('gkeep').save_win_positions(...)", bufnr.number)
-        bufnr[:] = list(parser.serialize(self._config, note))
-        bufnr.options["modified"] = False
-        util.set_note_opts_and_vars(note, bufnr)
-        self._vim.exec_lua("require('gkeep').restore_win_positions()")
+        calls.extend(
+            [
+                (
+                    "nvim_exec_lua",
+                    ["require('gkeep').save_win_positions(...)", [bufnr.number]],
+                ),
+                (
+                    "nvim_buf_set_lines",
+                    [bufnr, 0, -1, True, parser.serialize(self._config, note)],
+                ),
+                ("nvim_buf_set_option", [bufnr, "modified", False]),
+                ("nvim_exec_lua", ["require('gkeep').restore_win_positions()", []]),
+            ]
+        )
+        util.call_atomic(self._vim, calls)
+        util.set_note_opts_and_vars(note, bufnr, ft)
 
     def rerender_note(self, id: str) -> None:
         for bufnr in self._vim.buffers:
@@ -9,6 +9,16 @@ from pynvim.api import Buffer, Nvim, Window
 
 
 class View(ABC):
+    _KEYMAP_OPTS = {"silent": True, "noremap": True}
+    # Maps action name to its cmd_ method, built for each subclass
+    _actions: t.Dict[str, t.Callable[..., None]] = {}
+
+    def __init_subclass__(cls, **kwargs: t.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._actions = {
+            name[4:]: getattr(cls, name) for name in dir(cls) if name.startswith("cmd_")
+        }
+
     def __init__(
         self,
         vim: Nvim,
@@ -23,11 +33,20 @@ class View(ABC):
         self._modal = modal
         self._bufnr: t.Optional[Buffer] = None
         self._title = title
+        self._shortcuts: t.Optional[t.List[t.Tuple[str, str, str, str]]] = None
+        self._shortcut_maps: t.Optional[t.List[t.Tuple[str, str, str]]] = None
 
     @abstractmethod
     def _get_shortcuts(self) -> t.List[t.Tuple[str, str, str, str]]:
         raise NotImplementedError
 
+    @property
+    def shortcuts(self) -> t.List[t.Tuple[str, str, str, str]]:
+        # The shortcuts never change, so only build them once
+        if self._shortcuts is None:
+            self._shortcuts = self._get_shortcuts()
+        return self._shortcuts
+
     @property
     def bufnr(self) -> t.Optional[Buffer]:
         if self._bufnr is not None and self._bufnr.valid:
@@ -42,43 +61,66 @@ class View(ABC):
         bufnr = self.bufnr
         if bufnr is None:
             return None
-        curwin = self._vim.current.window
-        if curwin.buffer == bufnr:
+        # One request instead of fetching the buffer of every window
+        curwin, tab_wins, buf_winids = util.call_atomic(
+            self._vim,
+            [
+                ("nvim_get_current_win", []),
+                ("nvim_tabpage_list_wins", [0]),
+                ("nvim_call_function", ["win_findbuf", [bufnr.number]]),
+            ],
+        )
+        if not buf_winids:
+            return None
+        if curwin.handle in buf_winids:
             return curwin
-        for window in self._vim.current.tabpage.windows:
-            if bufnr == window.buffer:
+        for window in tab_wins:
+            if window.handle in buf_winids:
                 return window
         return None
 
     def _create_buffer(self) -> None:
-        self._bufnr = self._vim.api.create_buf(False, True)
-        assert self._bufnr is not None
-        self._vim.current.buffer = self._bufnr
-        self._bufnr.options["buftype"] = "nofile"
-        self._bufnr.options["bufhidden"] = "wipe"
-        self._bufnr.options["swapfile"] = False
-        self._bufnr.options["modifiable"] = False
-
-        for modes, lhs, rhs, _ in self._get_shortcuts():
-            self.keymap(lhs, rhs, modes)
-        self._setup_buffer(self._bufnr)
+        self._bufnr = bufnr = self._vim.api.create_buf(False, True)
+        assert bufnr is not None
+        calls: t.List[util.AtomicCall] = [
+            ("nvim_set_current_buf", [bufnr]),
+            ("nvim_buf_set_option", [bufnr, "buftype", "nofile"]),
+            ("nvim_buf_set_option", [bufnr, "bufhidden", "wipe"]),
+            ("nvim_buf_set_option", [bufnr, "swapfile", False]),
+            ("nvim_buf_set_option", [bufnr, "modifiable", False]),
+        ]
+        if self._shortcut_maps is None:
+            self._shortcut_maps = [
+                mapping
+                for modes, lhs, rhs, _ in self.shortcuts
+                for mapping in self._expand_keymap(lhs, rhs, modes)
+            ]
+        opts = self._KEYMAP_OPTS
+        for mode, lhs, rhs in self._shortcut_maps:
+            calls.append(("nvim_buf_set_keymap", [bufnr, mode, lhs, rhs, opts]))
+        calls.extend(self._setup_buffer(bufnr))
+        util.call_atomic(self._vim, calls)
 
     @abstractmethod
-    def _setup_buffer(self, buffer: Buffer) -> None:
+    def _setup_buffer(self, buffer: Buffer) -> t.List[util.AtomicCall]:
+        """Return the API calls to finish setting up a newly created buffer"""
         raise NotImplementedError
 
     def _configure_win(self, window: Window) -> None:
-        window.options["winfixwidth"] = True
-        window.options["number"] = False
-        window.options["relativenumber"] = False
-        window.options["signcolumn"] = "no"
-        window.options["foldcolumn"] = "0"
-        window.options["wrap"] = False
-        window.api.set_width(self._config.width)
-        self._setup_win(window)
-
-    def _setup_win(self, window: Window) -> None:
-        pass
+        calls: t.List[util.AtomicCall] = [
+            ("nvim_win_set_option", [window, "winfixwidth", True]),
+            ("nvim_win_set_option", [window, "number", False]),
+            ("nvim_win_set_option", [window, "relativenumber", False]),
+            ("nvim_win_set_option", [window, "signcolumn", "no"]),
+            ("nvim_win_set_option", [window, "foldcolumn", "0"]),
+            ("nvim_win_set_option", [window, "wrap", False]),
+            ("nvim_win_set_width", [window, self._config.width]),
+        ]
+        calls.extend(self._setup_win(window))
+        util.call_atomic(self._vim, calls)
+
+    def _setup_win(self, window: Window) -> t.List[util.AtomicCall]:
+        return []
 
     @property
     def is_inside(self) -> bool:
@@ -90,16 +132,21 @@ class View(ABC):
             window.api.close(True)
 
     def is_normal_win(self, window: Window) -> bool:
-        config = window.api.get_config()
-        if config["relative"] != "":
-            return False
-        if self._vim.funcs.win_gettype(window) != "":
-            return False
-        if window.options["previewwindow"]:
-            return False
-        if window.buffer.options["buftype"] != "":
-            return False
-        return True
+        config, wintype, previewwindow, buftype = util.call_atomic(
+            self._vim,
+            [
+                ("nvim_win_get_config", [window]),
+                ("nvim_call_function", ["win_gettype", [window.handle]]),
+                ("nvim_win_get_option", [window, "previewwindow"]),
+                ("nvim_call_function", ["getwinvar", [window.handle, "&buftype"]]),
+            ],
+        )
+        return (
+            config["relative"] == ""
+            and wintype == ""
+            and not previewwindow
+            and buftype == ""
+        )
 
     def keymap(
         self,
@@ -109,24 +156,47 @@ class View(ABC):
         opts: t.Optional[t.Dict[str, bool]] = None,
     ) -> None:
         if self._bufnr:
-            if opts is None:
-                opts = {"silent": True, "noremap": True}
-            for mode in modes:
-                # Make sure we leave visual mode after executing the map
-                if mode == "v":
-                    rhs += "<Esc>"
-                self._bufnr.api.set_keymap(mode, lhs, rhs, opts)
+            util.call_atomic(
+                self._vim, self._keymap_calls(self._bufnr, lhs, rhs, modes, opts)
+            )
+
+    def _keymap_calls(
+        self,
+        bufnr: Buffer,
+        lhs: str,
+        rhs: str,
+        modes: str = "n",
+        opts: t.Optional[t.Dict[str, bool]] = None,
+    ) -> t.List[util.AtomicCall]:
+        if opts is None:
+            opts = self._KEYMAP_OPTS
+        return [
+            ("nvim_buf_set_keymap", [bufnr, mode, lhs, mode_rhs, opts])
+            for mode, lhs, mode_rhs in self._expand_keymap(lhs, rhs, modes)
+        ]
+
+    @staticmethod
+    def _expand_keymap(
+        lhs: str, rhs: str, modes: str
+    ) -> t.List[t.Tuple[str, str, str]]:
+        maps = []
+        for mode in modes:
+            # Make sure we leave visual mode after executing the map
+            if mode == "v":
+                rhs += "<Esc>"
+            maps.append((mode, lhs, rhs))
+        return maps
 
     def action(self, action: str, *args: t.Any) -> None:
-        meth = f"cmd_{action}"
-        if hasattr(self, meth):
-            getattr(self, meth)(*args)
+        meth = self._actions.get(action)
+        if meth is not None:
+            meth(self, *args)
         else:
             util.echoerr(self._vim, f"Unknown Gkeep action '{action}'")
 
     def cmd_show_help(self) -> None:
         elements = []
-        for _, lhs, _, desc in self._get_shortcuts():
+        for _, lhs, _, desc in self.shortcuts:
             elements.append(Element(lhs, [(lhs.ljust(6), "Special"), (desc, "Normal")]))
         layout = GridLayout(self._vim, GridLayout.cols_from_1d(elements, 0))
         self._modal.confirm.show(
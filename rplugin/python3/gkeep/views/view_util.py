@@ -1,5 +1,6 @@
 import os
 import typing as t
+import unicodedata
 from functools import partial
 
 from gkeep import fssync, parser, util
@@ -7,9 +8,15 @@ from gkeep.api import KeepApi
 from gkeep.config import KEEP_FT, Config
 from gkeep.modal import Element, GridLayout, Modal, TextAlign
 from gkeep.util import NoteEnum, NoteFormat, NoteType, NoteUrl
-from gkeepapi.node import List, Note
+from gkeepapi.node import ColorValue, List, Note
 from pynvim.api import Buffer, Nvim
 
+_TYPE_AND_FORMAT = {
+    NoteFormat.NOTE: (NoteEnum.NOTE, KEEP_FT),
+    NoteFormat.LIST: (NoteEnum.LIST, KEEP_FT),
+    NoteFormat.NEORG: (NoteEnum.NOTE, "norg"),
+}
+
 
 def get_note_format(config: Config, note: NoteType) -> NoteFormat:
     if util.get_type(note) == NoteEnum.LIST:
@@ -21,84 +28,248 @@ def get_note_format(config: Config, note: NoteType) -> NoteFormat:
 
 
 def split_type_and_format(note_type: NoteFormat) -> t.Tuple[NoteEnum, str]:
-    if note_type == NoteFormat.NOTE:
-        return (NoteEnum.NOTE, KEEP_FT)
-    elif note_type == NoteFormat.LIST:
-        return (NoteEnum.LIST, KEEP_FT)
-    elif note_type == NoteFormat.NEORG:
-        return (NoteEnum.NOTE, "norg")
-    else:
-        raise ValueError(f"Invalid note type {note_type}")
+    try:
+        return _TYPE_AND_FORMAT[note_type]
+    except KeyError:
+        raise ValueError(f"Invalid note type {note_type}") from None
 
 
 def get_local_changed_file(
-    config: Config, api: KeepApi, note: NoteType
+    config: Config,
+    api: KeepApi,
+    note: NoteType,
+    local_files: t.Optional[t.Set[str]] = None,
 ) -> t.Optional[str]:
+    """Get the local backup of a note, if it exists
+
+    If local_files (from fssync.find_local_files) is passed in, it is checked
+    instead of the filesystem
+    """
     filepath = NoteUrl.from_note(note).filepath(api, config, note)
     if filepath is not None:
         local = fssync.get_local_file(filepath)
-        if os.path.exists(local):
+        if local_files is None:
+            if os.path.exists(local):
+                return local
+        elif local in local_files:
             return local
     return None
 
 
-def render_note_line(
-    vim: Nvim,
+# Unicode categories that may not take up a cell
+_ZERO_WIDTH = frozenset(["Mn", "Me", "Cf", "Cc"])
+# Hangul Jamo medial vowels and final consonants are category Lo, but they combine
+# with the preceding syllable and take up no cell of their own
+_ZERO_WIDTH_RANGES = (("\u1160", "\u11ff"), ("\ud7b0", "\ud7ff"))
+
+_COLOR_HL = {color: f"GKeep{color.value}" for color in ColorValue}
+
+
+class NoteIcons(t.NamedTuple):
+    """The icons used by build_note_line, looked up once per render"""
+
+    list: str
+    list_width: int
+    note: str
+    note_width: int
+    diff: str
+    diff_width: int
+    archived: str
+    trashed: str
+    pinned: str
+
+    @classmethod
+    def from_config(cls, config: Config) -> "NoteIcons":
+        return cls(
+            config.get_icon("list"),
+            config.get_icon_width("list"),
+            config.get_icon("note"),
+            config.get_icon_width("note"),
+            config.get_icon("diff"),
+            config.get_icon_width("diff"),
+            config.get_icon("archived"),
+            config.get_icon("trashed"),
+            config.get_icon("pinned"),
+        )
+
+
+def build_note_line(
     config: Config,
     api: KeepApi,
     row: int,
     note: NoteType,
     highlights: t.List[t.Tuple[str, int, int, int]],
+    icons: t.Optional[NoteIcons] = None,
+    local_files: t.Optional[t.Set[str]] = None,
 ) -> str:
-    pieces = []
-    col = 0
+    if icons is None:
+        icons = NoteIcons.from_config(config)
     if isinstance(note, List):
-        icon = "list"
+        icon = icons.list
+        col = icons.list_width
     else:
-        icon = "note"
-    pieces.append(config.get_icon(icon))
-    icon_width = config.get_icon_width(icon)
-    highlights.append((f"GKeep{note.color.value}", row, col, col + icon_width))
-    col += icon_width
+        icon = icons.note
+        col = icons.note_width
+    highlights.append((_COLOR_HL[note.color], row, 0, col))
 
-    local_file = get_local_changed_file(config, api, note)
+    diff = ""
+    local_file = get_local_changed_file(config, api, note, local_files)
     if local_file is not None:
-        pieces.append(config.get_icon("diff"))
-        icon_width = config.get_icon_width("diff")
-        highlights.append(("Error", row, col, col + icon_width))
-        col += icon_width
-
-    if note.archived:
-        pieces.append(config.get_icon("archived"))
-    if note.trashed:
-        pieces.append(config.get_icon("trashed"))
-    if note.pinned:
-        pieces.append(config.get_icon("pinned"))
-
-    entry = note.title
-    if not entry:
-        entry = "<No title>"
-    pieces.append(entry)
-    text = "".join(pieces)
-    length = vim.strwidth(text)
-    if length < config.width:
-        text += " " * (config.width - length)
-    return text
+        diff = icons.diff
+        highlights.append(("Error", row, col, col + icons.diff_width))
+
+    return "".join(
+        (
+            icon,
+            diff,
+            icons.archived if note.archived else "",
+            icons.trashed if note.trashed else "",
+            icons.pinned if note.pinned else "",
+            note.title or "<No title>",
+        )
+    )
+
+
+def _min_display_width(text: str, width: int) -> int:
+    """A lower bound of the display width, or -1 if it may be less than width
+
+    Every character except combining marks, format characters and conjoining
+    Hangul Jamo takes up at least one cell, so long lines can skip asking Neovim
+    for the real width.
+    """
+    if len(text) < width:
+        return -1
+    cells = sum(1 for char in text if not _is_zero_width(char))
+    return cells if cells >= width else -1
+
+
+def _is_zero_width(char: str) -> bool:
+    if unicodedata.category(char) in _ZERO_WIDTH:
+        return True
+    return any(start <= char <= end for start, end in _ZERO_WIDTH_RANGES)
+
+
+def pad_note_lines(vim: Nvim, config: Config, texts: t.List[str]) -> t.List[str]:
+    """Pad lines out to the configured width
+
+    ASCII widths are computed locally, lines that are clearly too long to need
+    padding are skipped, and the rest are fetched in one request
+    """
+    width = config.width
+    lengths = [
+        len(text) if text.isascii() else _min_display_width(text, width)
+        for text in texts
+    ]
+    wide = [i for i, length in enumerate(lengths) if length < 0]
+    if wide:
+        results = util.call_atomic(vim, [("nvim_strwidth", [texts[i]]) for i in wide])
+        for i, length in zip(wide, results):
+            lengths[i] = length
+    return [
+        text + " " * (width - length) if length < width else text
+        for text, length in zip(texts, lengths)
+    ]
+
+
+def replace_lines_calls(
+    buf: Buffer,
+    lines: t.List[str],
+    ns: int,
+    highlights: t.Sequence[t.Tuple[str, int, int, int]] = (),
+) -> t.List[util.AtomicCall]:
+    """API calls to replace all lines and highlights of a nomodifiable buffer"""
+    calls: t.List[util.AtomicCall] = [
+        ("nvim_buf_set_option", [buf, "modifiable", True]),
+        ("nvim_buf_set_lines", [buf, 0, -1, True, lines]),
+        ("nvim_buf_set_option", [buf, "modifiable", False]),
+        ("nvim_buf_clear_namespace", [buf, ns, 0, -1]),
+    ]
+    for hl_group, row, col_start, col_end in highlights:
+        calls.append(
+            ("nvim_buf_add_highlight", [buf, ns, hl_group, row, col_start, col_end])
+        )
+    return calls
+
+
+def update_lines_calls(
+    buf: Buffer,
+    old_lines: t.List[str],
+    old_highlights: t.Sequence[t.Tuple[str, int, int, int]],
+    lines: t.List[str],
+    highlights: t.Sequence[t.Tuple[str, int, int, int]],
+    ns: int,
+) -> t.List[util.AtomicCall]:
+    """API calls to rewrite only the rows that differ from the previous render"""
+
+    def by_row(
+        n: int, hls: t.Sequence[t.Tuple[str, int, int, int]]
+    ) -> t.List[t.List[t.Tuple[str, int, int]]]:
+        rows: t.List[t.List[t.Tuple[str, int, int]]] = [[] for _ in range(n)]
+        for hl_group, row, col_start, col_end in hls:
+            rows[row].append((hl_group, col_start, col_end))
+        return rows
+
+    old_rows = by_row(len(old_lines), old_highlights)
+    new_rows = by_row(len(lines), highlights)
+    shortest = min(len(old_lines), len(lines))
+    start = 0
+    while (
+        start < shortest
+        and old_lines[start] == lines[start]
+        and old_rows[start] == new_rows[start]
+    ):
+        start += 1
+    if start == len(old_lines) == len(lines):
+        return []
+    suffix = 0
+    while (
+        suffix < shortest - start
+        and old_lines[-1 - suffix] == lines[-1 - suffix]
+        and old_rows[-1 - suffix] == new_rows[-1 - suffix]
+    ):
+        suffix += 1
+    old_end = len(old_lines) - suffix
+    end = len(lines) - suffix
+
+    # Clear before replacing the lines so the highlights of deleted rows don't
+    # collapse onto the rows that are kept
+    calls: t.List[util.AtomicCall] = [
+        ("nvim_buf_clear_namespace", [buf, ns, start, old_end]),
+        ("nvim_buf_set_option", [buf, "modifiable", True]),
+        ("nvim_buf_set_lines", [buf, start, old_end, True, lines[start:end]]),
+        ("nvim_buf_set_option", [buf, "modifiable", False]),
+    ]
+    for row in range(start, end):
+        for hl_group, col_start, col_end in new_rows[row]:
+            calls.append(
+                ("nvim_buf_add_highlight", [buf, ns, hl_group, row, col_start, col_end])
+            )
+    return calls
+
+
+def build_note_list(
+    vim: Nvim, config: Config, api: KeepApi, notes: t.List[NoteType]
+) -> t.Tuple[t.List[str], t.List[t.Tuple[str, int, int, int]]]:
+    highlights: t.List[t.Tuple[str, int, int, int]] = []
+    icons = NoteIcons.from_config(config)
+    local_files = fssync.find_local_files(config)
+    texts = [
+        build_note_line(config, api, i, note, highlights, icons, local_files)
+        for i, note in enumerate(notes)
+    ]
+    return pad_note_lines(vim, config, texts), highlights
 
 
 def render_note_list(
-    vim: Nvim, config: Config, api: KeepApi, buf: Buffer, notes: t.List[NoteType]
+    vim: Nvim,
+    config: Config,
+    api: KeepApi,
+    buf: Buffer,
+    notes: t.List[NoteType],
+    ns: int,
 ) -> None:
-    lines = []
-    highlights: t.List[t.Tuple[str, int, int, int]] = []
-    for i, note in enumerate(notes):
-        line = render_note_line(vim, config, api, i, note, highlights)
-        lines.append(line)
-    buf.options["modifiable"] = True
-    buf[:] = lines
-    buf.options["modifiable"] = False
-    ns = vim.api.create_namespace("GkeepNoteListHL")
-    buf.update_highlights(ns, highlights, clear=True)
+    lines, highlights = build_note_list(vim, config, api, notes)
+    util.call_atomic(vim, replace_lines_calls(buf, lines, ns, highlights))
 
 
 class NoteTypeEditor:
@@ -153,14 +324,14 @@ class NoteTypeEditor:
         bufname = url.bufname(self._api, self._config, note)
         old_filetype = parser.get_filetype(self._config, note)
         if note_type == NoteEnum.NOTE and not isinstance(note, Note):
-            lines = []
             new_note = Note()
-            for i, item in enumerate(note.items):
-                lines.append(item.text)
-                if i == 0:
-                    new_note.append(item)
-                else:
-                    item.delete()
+            # List.items sorts the children on every access
+            items = note.items
+            lines = [item.text for item in items]
+            if items:
+                new_note.append(items[0])
+            for item in items[1:]:
+                item.delete()
             raw = note.save(True)
             new_note.load(raw)
             new_note.text = "\n".join(lines)
@@ -174,10 +345,10 @@ class NoteTypeEditor:
             new_note.load(raw)
             for child in note.children:
                 new_note.append(child)
-            sort = int(new_note.items[0].sort)
-            for line in lines:
+            start = int(new_note.items[0].sort)
+            sorts = range(start, start - 100000 * len(lines), -100000)
+            for line, sort in zip(lines, sorts):
                 new_note.add(line, False, sort)
-                sort -= 100000
         else:
             new_note = note
             if isinstance(new_note, Note):
@@ -5,10 +5,17 @@ from pathlib import Path
 
 import pytest
 from freezegun import freeze_time
-from gkeep import parser
+from gkeep import fssync, parser
 from gkeep.api import KeepApi
 from gkeep.config import Config, State
-from gkeep.fssync import FileSync, NoteFile, _write_file, get_local_file
+from gkeep.fssync import (
+    FileSync,
+    NoteFile,
+    _find_files,
+    _write_file,
+    get_local_file,
+    move_files,
+)
 from gkeep.util import NoteUrl
 from gkeepapi.node import List, Note, TopLevelNode
 
@@ -49,9 +56,7 @@ def write_note(
     if text is not None:
         note = deepcopy(note)
         note.text = text
-    lines = list(parser.serialize(config, note))
-    if strip_id:
-        lines = [l for l in lines if not l.startswith("id:")]
+    lines = parser.serialize(config, note, include_id=not strip_id)
     _write_file(fname, lines, False)
     return fname
 
@@ -72,6 +77,106 @@ def test_write_note(api: KeepApi, config: Config, fsync: FileSync) -> None:
     assert os.path.exists(fname), "The note should be written to a file"
 
 
+def test_write_multiple_notes(api: KeepApi, config: Config, fsync: FileSync) -> None:
+    """Write several notes at once"""
+    finish_startup(fsync, config)
+    notes = []
+    for i in range(5):
+        note = Note()
+        note.title = f"Note {i}"
+        note.text = f"Text {i}"
+        notes.append(note)
+    renames = fsync.write_files([NoteFile.from_note(api, config, n) for n in notes])
+    assert len(renames) == len(notes)
+    for note in notes:
+        fname = NoteUrl.from_note(note).filepath(api, config, note)
+        assert fname is not None
+        assert os.path.exists(fname), "Every note should be written to a file"
+        new_note = Note()
+        parser.parse(api, config, fname, new_note)
+        assert new_note.text == note.text
+
+
+def test_skip_unchanged_file(
+    api: KeepApi, config: Config, fsync: FileSync, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Unchanged note files are neither re-read nor re-written"""
+    finish_startup(fsync, config)
+    note = Note()
+    note.title = "My Note"
+    note.text = "Some text"
+    fsync.write_files([NoteFile.from_note(api, config, note)])
+    fname = NoteUrl.from_note(note).filepath(api, config, note)
+    assert fname is not None
+    # A digest is only trusted once the mtime is old enough
+    stat = os.stat(fname)
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+    fsync.write_files([NoteFile.from_note(api, config, note)])
+
+    def fail(*_: t.Any) -> None:
+        raise AssertionError("File should not be touched")
+
+    monkeypatch.setattr(fssync, "_hash_file", fail)
+    monkeypatch.setattr(fssync, "_write_file", fail)
+    fsync.write_files([NoteFile.from_note(api, config, note)])
+
+
+def test_detect_racy_edit(api: KeepApi, config: Config, fsync: FileSync) -> None:
+    """Edits that keep the file size and mtime are detected if the mtime is recent"""
+    finish_startup(fsync, config)
+    note = Note()
+    note.title = "My Note"
+    note.text = "aaaa"
+    fsync.write_files([NoteFile.from_note(api, config, note)])
+    fname = NoteUrl.from_note(note).filepath(api, config, note)
+    assert fname is not None
+    stat = os.stat(fname)
+    write_note(api, config, note, text="bbbb")
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    fsync.write_files([NoteFile.from_note(api, config, note)])
+    new_note = Note()
+    parser.parse(api, config, fname, new_note)
+    assert new_note.text == "aaaa", "Note file should be rewritten"
+
+
+def test_detect_same_size_edit(api: KeepApi, config: Config, fsync: FileSync) -> None:
+    """Edits that keep the file size are detected by the new mtime"""
+    finish_startup(fsync, config)
+    note = Note()
+    note.title = "My Note"
+    note.text = "aaaa"
+    fsync.write_files([NoteFile.from_note(api, config, note)])
+    fname = NoteUrl.from_note(note).filepath(api, config, note)
+    assert fname is not None
+    stat = os.stat(fname)
+    write_note(api, config, note, text="bbbb")
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert os.stat(fname).st_size == stat.st_size
+    fsync.write_files([NoteFile.from_note(api, config, note)])
+    new_note = Note()
+    parser.parse(api, config, fname, new_note)
+    assert new_note.text == "aaaa", "Note file should be rewritten"
+
+
+def test_url_cache_invalidated(api: KeepApi, config: Config) -> None:
+    """Cached file urls are re-read when the file changes"""
+    note = Note()
+    note.title = "My Note"
+    fname = write_note(api, config, note)
+    urls: t.Dict[str, fssync.CachedUrl] = {}
+    assert [(f, u.id, u.title) for f, u in _find_files(config, urls)] == [
+        (fname, note.id, "My Note")
+    ]
+    stat = os.stat(fname)
+    other = Note()
+    other.title = "Other Note"
+    _write_file(fname, parser.serialize(config, other), False)
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert [(f, u.id, u.title) for f, u in _find_files(config, urls)] == [
+        (fname, other.id, "Other Note")
+    ]
+
+
 def test_no_write_trashed_notes(api: KeepApi, config: Config, fsync: FileSync) -> None:
     """Don't write trashed notes to directory"""
     finish_startup(fsync, config)
@@ -221,6 +326,59 @@ def test_delete_file(api: KeepApi, config: Config, fsync: FileSync) -> None:
     assert not os.path.exists(fname)
 
 
+def test_move_files(api: KeepApi, config: Config) -> None:
+    """Files are renamed, or deleted if they became ephemeral"""
+    renamed = Note()
+    renamed.title = "Renamed"
+    deleted = Note()
+    deleted.title = "Deleted"
+    renamed_file = write_note(api, config, renamed)
+    deleted_file = write_note(api, config, deleted)
+    assert config.sync_dir is not None
+    new_file = os.path.join(config.sync_dir, "New name.keep")
+    url = NoteUrl.from_note(deleted)
+    move_files(
+        {
+            renamed_file: new_file,
+            deleted_file: url.ephemeral_bufname(config, deleted),
+        }
+    )
+    assert not os.path.exists(renamed_file)
+    assert os.path.exists(new_file), "The file should be moved to the new name"
+    assert not os.path.exists(deleted_file), "Ephemeral notes are removed from disk"
+
+
+def test_move_files_chain(config: Config) -> None:
+    """Files can be renamed onto the old name of another renamed file"""
+    assert config.sync_dir is not None
+    first = os.path.join(config.sync_dir, "First.keep")
+    second = os.path.join(config.sync_dir, "Second.keep")
+    third = os.path.join(config.sync_dir, "Third.keep")
+    for fname in (first, second):
+        _write_file(fname, [fname], False)
+    move_files({first: second, second: third})
+    assert not os.path.exists(first)
+    with open(second, "r", encoding="utf-8") as ifile:
+        assert ifile.read() == first + "\n"
+    with open(third, "r", encoding="utf-8") as ifile:
+        assert ifile.read() == second + "\n"
+
+
+def test_move_files_swap(config: Config) -> None:
+    """Files can swap names"""
+    assert config.sync_dir is not None
+    first = os.path.join(config.sync_dir, "First.keep")
+    second = os.path.join(config.sync_dir, "Second.keep")
+    for fname in (first, second):
+        _write_file(fname, [fname], False)
+    move_files({first: second, second: first})
+    with open(first, "r", encoding="utf-8") as ifile:
+        assert ifile.read() == second + "\n"
+    with open(second, "r", encoding="utf-8") as ifile:
+        assert ifile.read() == first + "\n"
+    assert sorted(os.listdir(config.sync_dir)) == ["First.keep", "Second.keep"]
+
+
 def test_protect_deleted(api: KeepApi, config: Config, fsync: FileSync) -> None:
     """Deleted notes that are protected are moved to local"""
     note = Note()
@@ -104,6 +104,21 @@ some text"""
     )
 
 
+def test_serialize_without_id(config: Config, note: Note) -> None:
+    """Serialize note without the id"""
+    lines = parser.serialize(config, note, include_id=False)
+    assert lines[:2] == ["# My Note", 'labels: OneWord, Two Words, "Has, Comma"']
+
+
+def test_serialize_neorg_without_id(config: Config, note: Note) -> None:
+    """Serialize neorg note without the gkeep meta field"""
+    lines = parser.serialize(config, note, "norg", include_id=False)
+    assert not any(line.startswith("\tgkeep:") for line in lines)
+    note.text = "@document.meta\n\ttitle: My Note\n\tgkeep: abc123\n@end\n\nbody"
+    lines = parser.serialize(config, note, "norg", include_id=False)
+    assert lines == ["@document.meta", "\ttitle: My Note", "@end", "", "body"]
+
+
 def test_detect_note() -> None:
     nt = keep.detect_note_type(
         "test.keep",
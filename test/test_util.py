@@ -0,0 +1,25 @@
+import typing as t
+
+import pytest
+from gkeep.util import NoteUrl
+
+
+@pytest.mark.parametrize(
+    "bufname,id,title",
+    [
+        ("gkeep://abc/My Note.keep", "abc", "My Note"),
+        ("gkeep://abc/My Note.norg", "abc", "My Note"),
+        ("gkeep://abc/v1.2 notes.keep", "abc", "v1.2 notes"),
+        ("gkeep://abc/No extension", "abc", "No extension"),
+        ("gkeep://abc/.hidden", "abc", ".hidden"),
+        ("gkeep://abc/.hidden.keep", "abc", ".hidden"),
+        ("gkeep://abc/..keep", "abc", "..keep"),
+        ("gkeep://abc/a/b.keep", "abc", "a/b"),
+        ("gkeep://abc/a.b/c", "abc", "a.b/c"),
+        ("gkeep:///Title.keep", None, "Title"),
+    ],
+)
+def test_parse_ephemeral_bufname(bufname: str, id: t.Optional[str], title: str) -> None:
+    url = NoteUrl.from_ephemeral_bufname(bufname)
+    assert url.id == id
+    assert url.title == title
@@ -0,0 +1,70 @@
+import typing as t
+
+import pytest
+from gkeep.views.view_util import _min_display_width, update_lines_calls
+
+BUF = 1
+NS = 2
+
+
+def set_lines(start: int, end: int, lines: t.List[str]) -> t.List[t.Any]:
+    return [
+        ("nvim_buf_clear_namespace", [BUF, NS, start, end]),
+        ("nvim_buf_set_option", [BUF, "modifiable", True]),
+        ("nvim_buf_set_lines", [BUF, start, end, True, lines]),
+        ("nvim_buf_set_option", [BUF, "modifiable", False]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "old_lines,lines,expected",
+    [
+        (["a", "b", "c"], ["a", "b", "c"], []),
+        ([], [], []),
+        ([], ["a", "b"], set_lines(0, 0, ["a", "b"])),
+        (["a", "b"], [], set_lines(0, 2, [])),
+        (["a", "c"], ["a", "b", "c"], set_lines(1, 1, ["b"])),
+        (["a", "b", "c"], ["a", "c"], set_lines(1, 2, [])),
+        (["a", "b", "c"], ["a", "x", "c"], set_lines(1, 2, ["x"])),
+        (["a", "b"], ["x", "y", "z"], set_lines(0, 2, ["x", "y", "z"])),
+    ],
+)
+def test_update_lines_calls(
+    old_lines: t.List[str], lines: t.List[str], expected: t.List[t.Any]
+) -> None:
+    calls = update_lines_calls(BUF, old_lines, [], lines, [], NS)
+    assert calls == expected
+
+
+def test_update_highlights() -> None:
+    """Rows whose highlights changed are rewritten and re-highlighted"""
+    lines = ["a", "b", "c"]
+    calls = update_lines_calls(
+        BUF,
+        lines,
+        [("Old", 1, 0, 1)],
+        lines,
+        [("New", 1, 0, 1)],
+        NS,
+    )
+    assert calls == set_lines(1, 2, ["b"]) + [
+        ("nvim_buf_add_highlight", [BUF, NS, "New", 1, 0, 1])
+    ]
+
+
+@pytest.mark.parametrize(
+    "text,true_width",
+    [
+        ("e\u0301" * 10, 10),
+        ("日本語" * 4, 24),
+        ("\u1100\u1161\u11a8" * 10, 20),
+        ("abc\u200bdef", 6),
+        ("Café ☕ 日本 e\u0301", 14),
+    ],
+)
+def test_min_display_width(text: str, true_width: int) -> None:
+    """The lower bound never exceeds the real display width"""
+    for width in range(true_width + 2):
+        min_width = _min_display_width(text, width)
+        assert min_width <= true_width
+        assert min_width == -1 or min_width >= width